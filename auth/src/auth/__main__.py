@@ -1,7 +1,16 @@
 """Entry point for running the auth service via `python -m auth`."""
+import asyncio
+import contextlib
+import logging
+import os
+
 from fastapi import FastAPI
 from pydantic import BaseModel
-from .api import router
+from .api import router, purge_reset_tokens
+
+RESET_SWEEP_INTERVAL_SECONDS = float(os.getenv("AUTH_RESET_SWEEP_SECONDS", "3600"))
+
+logger = logging.getLogger(__name__)
 
 
 class HealthResponse(BaseModel):
@@ -10,7 +19,32 @@ class HealthResponse(BaseModel):
     version: str
 
 
-app = FastAPI(title="METAR Auth Service", version="0.1.0")
+async def _sweep_reset_tokens() -> None:
+    """Periodically drop used/expired reset tokens so the table stays small."""
+    while True:
+        try:
+            await purge_reset_tokens()
+        except Exception:
+            logger.exception("Reset token sweep failed")
+        await asyncio.sleep(RESET_SWEEP_INTERVAL_SECONDS)
+
+
+@contextlib.asynccontextmanager
+async def lifespan(app: FastAPI):
+    sweeper = asyncio.create_task(_sweep_reset_tokens())
+    try:
+        yield
+    finally:
+        sweeper.cancel()
+        with contextlib.suppress(asyncio.CancelledError):
+            await sweeper
+
+
+app = FastAPI(
+    title="METAR Auth Service",
+    version="0.1.0",
+    lifespan=lifespan,
+)
 app.include_router(router)
 
 
@@ -16,27 +16,44 @@ from __future__ import annotations
 from fastapi import Header
 
 import os
+import contextlib
+import time
 import datetime as dt
 from typing import List
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, status
+from fastapi.concurrency import run_in_threadpool
 from pydantic import BaseModel, EmailStr, Field, ConfigDict
-from sqlalchemy.orm import Session
+from sqlalchemy import delete, exists, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
 
-from .database import SessionLocal, init_db
+from .cache import TTLCache
+from .database import AsyncScopedSession, AsyncSessionLocal, init_db
 from .models import User, APIKey, PasswordResetToken
 from .security import (
+    DUMMY_PASSWORD_HASH,
     hash_password,
     verify_password,
+    password_needs_rehash,
     create_access_token,
     decode_access_token,
-    hash_api_key,
     create_reset_expiry,
 )
 
-# Initialize DB at import time (simple approach; consider migrations for prod)
-init_db()
 
-router = APIRouter(prefix="/auth", tags=["Auth"])
+@contextlib.asynccontextmanager
+async def _lifespan(app):
+    # Create tables once at startup (consider migrations for prod). Apps that
+    # include this router inherit the lifespan.
+    init_db()
+    yield
+
+
+router = APIRouter(prefix="/auth", tags=["Auth"], lifespan=_lifespan)
+
+# username -> User.id for recently authenticated users.
+_user_id_cache = TTLCache(
+    maxsize=2048, ttl=float(os.getenv("AUTH_USER_CACHE_TTL", "30")))
 
 
 class UserCreate(BaseModel):
@@ -54,7 +71,7 @@ class UserOut(BaseModel):
     address: str
     username: str
 
-    model_config = ConfigDict(from_attributes=True)
+    model_config = ConfigDict(strict=True, from_attributes=True)
 
 
 class LoginRequest(BaseModel):
@@ -74,7 +91,7 @@ class APIKeyOut(BaseModel):
     created_at: dt.datetime
     revoked: bool
 
-    model_config = ConfigDict(from_attributes=True)
+    model_config = ConfigDict(strict=True, from_attributes=True)
 
 
 class APIKeyCreateResponse(BaseModel):
@@ -95,25 +112,45 @@ class Message(BaseModel):
     message: str
 
 
-def get_db():
-    db = SessionLocal()
+async def get_db():
     try:
-        yield db
+        yield AsyncScopedSession()
     finally:
-        db.close()
+        await AsyncScopedSession.remove()
+
+
+async def _load_user_id(db: AsyncSession, username: str) -> int | None:
+    user_id = _user_id_cache.get(username)
+    if user_id is None:
+        user_id = await db.scalar(select(User.id).where(User.username == username))
+        if user_id is not None:
+            _user_id_cache.set(username, user_id)
+    return user_id
 
 
-def get_current_user(db: Session = Depends(get_db), authorization: str | None = Header(default=None)) -> User:
-    if not authorization or not authorization.lower().startswith("bearer "):
+async def _resolve_user(db: AsyncSession, username: str) -> User | None:
+    user_id = await _load_user_id(db, username)
+    user = await db.get(User, user_id) if user_id is not None else None
+    return user if user is not None and user.username == username else None
+
+
+async def get_current_user(db: AsyncSession = Depends(get_db), authorization: str | None = Header(default=None)) -> User:
+    # Only the 7-character scheme prefix is case-folded, not the whole token.
+    scheme = authorization[:7] if authorization else ""
+    if scheme != "Bearer " and scheme.lower() != "bearer ":
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED, detail="Not authenticated")
-    token = authorization.split()[1]
+    token = authorization[7:].strip()
     username = decode_access_token(token)
     if not username:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token")
-    user = db.query(User).filter(User.username == username).first()
-    if not user:
+    user = await _resolve_user(db, username)
+    if user is None:
+        # The cached id may be stale; look the username up once more.
+        _user_id_cache.pop(username)
+        user = await _resolve_user(db, username)
+    if user is None:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED, detail="User not found")
     return user
@@ -126,8 +163,11 @@ def send_reset_email(email: str, token: str):
 
 
 @router.post("/register", response_model=UserOut)
-def register(user_in: UserCreate, db: Session = Depends(get_db)):
-    if db.query(User).filter((User.username == user_in.username) | (User.email == user_in.email)).first():
+async def register(user_in: UserCreate, db: AsyncSession = Depends(get_db)):
+    # Two EXISTS probes so each can seek its own unique index (an OR across
+    # both columns tends to fall back to a table scan).
+    if (await db.scalar(select(exists().where(User.username == user_in.username)))
+            or await db.scalar(select(exists().where(User.email == user_in.email)))):
         raise HTTPException(
             status_code=400, detail="Username or email already exists")
     user = User(
@@ -135,60 +175,67 @@ def register(user_in: UserCreate, db: Session = Depends(get_db)):
         email=user_in.email,
         address=user_in.address,
         username=user_in.username,
-        password_hash=hash_password(user_in.password),
+        # Password hashing is CPU-bound; keep it off the event loop.
+        password_hash=await run_in_threadpool(hash_password, user_in.password),
     )
     db.add(user)
-    db.commit()
-    db.refresh(user)
+    await db.commit()
+    await db.refresh(user)
     return user
 
 
 @router.post("/login", response_model=LoginResponse)
-def login(req: LoginRequest, db: Session = Depends(get_db)):
-    user = db.query(User).filter(User.username == req.username).first()
-    if not user or not verify_password(req.password, user.password_hash):
+async def login(req: LoginRequest, db: AsyncSession = Depends(get_db)):
+    user = await db.scalar(
+        select(User)
+        .options(selectinload(User.api_keys.and_(APIKey.revoked.is_(False))))
+        .where(User.username == req.username))
+    # Always run a full verify so unknown usernames take as long as bad passwords.
+    stored_hash = user.password_hash if user else DUMMY_PASSWORD_HASH
+    if not await run_in_threadpool(verify_password, req.password, stored_hash) or not user:
         raise HTTPException(status_code=400, detail="Invalid credentials")
+    if password_needs_rehash(user.password_hash):
+        user.password_hash = await run_in_threadpool(hash_password, req.password)
+        await db.commit()
     token = create_access_token(sub=user.username)
-    key_ids = [k.id for k in user.api_keys if not k.revoked]
-    return LoginResponse(access_token=token, user=user, api_keys=[str(i) for i in key_ids])
+    return LoginResponse(access_token=token, user=user, api_keys=[str(k.id) for k in user.api_keys])
 
 
 @router.get("/me", response_model=UserOut)
-def me(user: User = Depends(get_current_user)):
+async def me(user: User = Depends(get_current_user)):
     return user
 
 
 @router.post("/apikeys", response_model=APIKeyCreateResponse)
-def create_apikey(user: User = Depends(get_current_user), db: Session = Depends(get_db)):
-    raw_key = APIKey.generate_raw_key()
-    hashed = hash_api_key(raw_key)
+async def create_apikey(user: User = Depends(get_current_user), db: AsyncSession = Depends(get_db)):
+    raw_key, hashed = APIKey.generate_raw_key()
     api_key = APIKey(key_hash=hashed, user_id=user.id)
     db.add(api_key)
-    db.commit()
-    db.refresh(api_key)
+    await db.commit()
+    await db.refresh(api_key)
     return APIKeyCreateResponse(id=api_key.id, raw_key=raw_key)
 
 
 @router.get("/apikeys", response_model=list[APIKeyOut])
-def list_apikeys(user: User = Depends(get_current_user), db: Session = Depends(get_db)):
-    keys = db.query(APIKey).filter(APIKey.user_id == user.id).all()
-    return keys
+async def list_apikeys(user: User = Depends(get_current_user), db: AsyncSession = Depends(get_db)):
+    keys = await db.scalars(select(APIKey).where(APIKey.user_id == user.id))
+    return keys.all()
 
 
 @router.delete("/apikeys/{key_id}", response_model=Message)
-def revoke_apikey(key_id: int, user: User = Depends(get_current_user), db: Session = Depends(get_db)):
-    key = db.query(APIKey).filter(APIKey.id == key_id,
-                                  APIKey.user_id == user.id).first()
+async def revoke_apikey(key_id: int, user: User = Depends(get_current_user), db: AsyncSession = Depends(get_db)):
+    key = await db.scalar(select(APIKey).where(APIKey.id == key_id,
+                                               APIKey.user_id == user.id))
     if not key:
         raise HTTPException(status_code=404, detail="API key not found")
     key.revoked = True
-    db.commit()
+    await db.commit()
     return Message(message="API key revoked")
 
 
 @router.post("/password-reset/request", response_model=Message)
-def request_reset(req: PasswordResetRequest, db: Session = Depends(get_db)):
-    user = db.query(User).filter(User.email == req.email).first()
+async def request_reset(req: PasswordResetRequest, background: BackgroundTasks, db: AsyncSession = Depends(get_db)):
+    user = await db.scalar(select(User).where(User.email == req.email))
     if not user:
         return Message(message="If the email exists a reset link was sent")
     token_value = PasswordResetToken.generate_token()
@@ -198,30 +245,42 @@ def request_reset(req: PasswordResetRequest, db: Session = Depends(get_db)):
         expires_at=create_reset_expiry(),
     )
     db.add(reset_token)
-    db.commit()
-    send_reset_email(user.email, token_value)
+    await db.commit()
+    # Deliver after the response is sent so mail I/O never holds the request.
+    background.add_task(send_reset_email, user.email, token_value)
     return Message(message="If the email exists a reset link was sent")
 
 
 @router.post("/password-reset/confirm", response_model=Message)
-def confirm_reset(req: PasswordResetConfirm, db: Session = Depends(get_db)):
-    token = db.query(PasswordResetToken).filter(
-        PasswordResetToken.token == req.token).first()
-    now_utc = dt.datetime.now(dt.UTC)
+async def confirm_reset(req: PasswordResetConfirm, db: AsyncSession = Depends(get_db)):
+    token = await db.scalar(select(PasswordResetToken).where(
+        PasswordResetToken.token == req.token))
     if not token:
         raise HTTPException(status_code=400, detail="Invalid or expired token")
     expires_at = token.expires_at
     if expires_at.tzinfo is None:
         expires_at = expires_at.replace(tzinfo=dt.UTC)
-    if token.used or expires_at < now_utc:
+    if token.used or expires_at.timestamp() < time.time():
         raise HTTPException(status_code=400, detail="Invalid or expired token")
-    user = db.query(User).filter(User.id == token.user_id).first()
+    user = await db.get(User, token.user_id)
     if not user:
         raise HTTPException(status_code=400, detail="User not found")
-    user.password_hash = hash_password(req.new_password)
+    user.password_hash = await run_in_threadpool(hash_password, req.new_password)
     token.used = True
-    db.commit()
+    await db.commit()
+    _user_id_cache.pop(user.username)
     return Message(message="Password reset successful")
 
 
-__all__ = ["router"]
+async def purge_reset_tokens() -> int:
+    """Delete used or expired password reset tokens; returns rows removed."""
+    async with AsyncSessionLocal() as db:
+        result = await db.execute(delete(PasswordResetToken).where(or_(
+            PasswordResetToken.used.is_(True),
+            PasswordResetToken.expires_at < dt.datetime.now(dt.UTC),
+        )))
+        await db.commit()
+    return result.rowcount
+
+
+__all__ = ["router", "purge_reset_tokens"]
@@ -0,0 +1,69 @@
+"""Small in-process TTL cache for auth hot paths (src layout)."""
+from __future__ import annotations
+
+import collections
+import threading
+import time
+from typing import Any, Hashable, Optional
+
+
+class TTLCache:
+    """Bounded mapping whose entries expire after a per-entry TTL.
+
+    Reads are lock-free (single dict lookups are atomic under the GIL);
+    writes and evictions take a lock. When full, the oldest insertions are
+    dropped, together with any already-expired entries queued behind them.
+    """
+
+    def __init__(self, maxsize: int, ttl: float) -> None:
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: collections.OrderedDict[Hashable, tuple[Any, float]] = (
+            collections.OrderedDict())
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        entry = self._data.get(key)
+        if entry is None:
+            return default
+        value, expires_at = entry
+        if expires_at <= time.monotonic():
+            self.pop(key)
+            return default
+        return value
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        ttl = self.ttl if ttl is None else ttl
+        if ttl <= 0 or self.maxsize <= 0:
+            return
+        now = time.monotonic()
+        with self._lock:
+            if key in self._data:
+                # A refreshed entry now expires last, so it moves to the back.
+                self._data.move_to_end(key)
+            elif len(self._data) >= self.maxsize:
+                self._evict(now)
+            self._data[key] = (value, now + ttl)
+
+    def pop(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            entry = self._data.pop(key, None)
+        return default if entry is None else entry[0]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def _evict(self, now: float) -> None:
+        # Entries mostly share one TTL, so insertion order tracks expiry order:
+        # only the front is examined, and each entry is visited once, when it
+        # is removed.
+        data = self._data
+        while data and (len(data) >= self.maxsize or next(iter(data.values()))[1] <= now):
+            data.popitem(last=False)
+
+
+__all__ = ["TTLCache"]
@@ -1,28 +1,95 @@
-"""Database setup for authentication module (src layout)."""
+"""Database setup for authentication module (src layout).
+
+Request handlers use the async engine through ``AsyncScopedSession``; the
+sync engine is kept for schema creation and synchronous callers.
+"""
 from __future__ import annotations
 
+import asyncio
 import os
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import (
+    AsyncSession, async_scoped_session, async_sessionmaker, create_async_engine)
 from sqlalchemy.orm import sessionmaker, DeclarativeBase
+from sqlalchemy.pool import StaticPool
 
 DATABASE_URL = os.getenv("AUTH_DB_URL", "sqlite:///./auth.db")
 
+# Async DBAPI driver for each supported sync URL scheme (bare or naming an
+# explicit sync driver). Schemes that already name an async driver pass
+# through unchanged.
+_ASYNC_DRIVERS = {
+    "sqlite": "sqlite+aiosqlite",
+    "sqlite+pysqlite": "sqlite+aiosqlite",
+    "postgresql": "postgresql+asyncpg",
+    "postgresql+psycopg2": "postgresql+asyncpg",
+    "postgresql+pg8000": "postgresql+asyncpg",
+}
+_ASYNC_SCHEMES = frozenset({"sqlite+aiosqlite", "postgresql+asyncpg", "postgresql+psycopg"})
+
+
+def _async_url(url: str) -> str:
+    """Return the async-driver form of ``url`` for the request handlers' engine.
+
+    Raises RuntimeError for backends without a known async driver; set
+    AUTH_ASYNC_DB_URL explicitly to use one.
+    """
+    scheme, sep, rest = url.partition("://")
+    if scheme in _ASYNC_SCHEMES:
+        return url
+    if scheme not in _ASYNC_DRIVERS:
+        raise RuntimeError(
+            f"AUTH_DB_URL scheme {scheme!r} has no known async driver; use one of "
+            f"{', '.join(sorted(_ASYNC_DRIVERS.keys() | _ASYNC_SCHEMES))} "
+            "or set AUTH_ASYNC_DB_URL.")
+    return _ASYNC_DRIVERS[scheme] + sep + rest
+
+
+ASYNC_DATABASE_URL = os.getenv("AUTH_ASYNC_DB_URL") or _async_url(DATABASE_URL)
+
 
 class Base(DeclarativeBase):
     pass
 
 
-engine = create_engine(
-    DATABASE_URL,
-    connect_args={"check_same_thread": False} if DATABASE_URL.startswith(
-        "sqlite") else {},
-)
+def _engine_kwargs(url: str) -> dict:
+    """Engine options per backend.
+
+    SQLite keeps SQLAlchemy's default pool; networked databases get a sized
+    QueuePool with pre-ping so connections are reused across requests.
+    In-memory SQLite (e.g. ``sqlite:///file::memory:?cache=shared&uri=true``)
+    uses StaticPool: the database only lives while a connection to it is
+    open, so each engine holds one for the life of the process.
+    """
+    if url.startswith("sqlite"):
+        kwargs: dict = {"connect_args": {"check_same_thread": False}}
+        if ":memory:" in url or "mode=memory" in url:
+            kwargs["poolclass"] = StaticPool
+        return kwargs
+    return {
+        "pool_size": int(os.getenv("AUTH_DB_POOL_SIZE", "20")),
+        "max_overflow": int(os.getenv("AUTH_DB_MAX_OVERFLOW", "10")),
+        "pool_timeout": 30,
+        "pool_pre_ping": True,
+        "pool_recycle": 3600,
+    }
+
+
+engine = create_engine(DATABASE_URL, **_engine_kwargs(DATABASE_URL))
 SessionLocal = sessionmaker(bind=engine, autoflush=False, autocommit=False)
 
+async_engine = create_async_engine(
+    ASYNC_DATABASE_URL, **_engine_kwargs(DATABASE_URL))
+AsyncSessionLocal = async_sessionmaker(
+    async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False)
+# One session per request: each request is served in its own asyncio task.
+AsyncScopedSession = async_scoped_session(
+    AsyncSessionLocal, scopefunc=asyncio.current_task)
+
 
 def init_db():
     from . import models  # noqa: F401 ensure models are imported
     Base.metadata.create_all(bind=engine)
 
 
-__all__ = ["SessionLocal", "Base", "init_db"]
+__all__ = ["SessionLocal", "AsyncSessionLocal", "AsyncScopedSession", "Base", "init_db"]
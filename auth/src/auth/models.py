@@ -1,6 +1,8 @@
 """SQLAlchemy models for authentication (src layout)."""
 from __future__ import annotations
 
+import base64
+import hashlib
 import secrets
 import datetime as dt
 from sqlalchemy import String, Integer, DateTime, Boolean, ForeignKey, Text
@@ -39,8 +41,14 @@ class APIKey(Base):
     user: Mapped["User"] = relationship(back_populates="api_keys")
 
     @staticmethod
-    def generate_raw_key() -> str:
-        return secrets.token_urlsafe(32)
+    def generate_raw_key() -> tuple[str, str]:
+        """Return ``(raw_key, key_hash)``.
+
+        The hash is taken over the key's ASCII bytes, so it equals
+        ``hash_api_key(raw_key)`` without encoding the string a second time.
+        """
+        raw = base64.urlsafe_b64encode(secrets.token_bytes(32)).rstrip(b"=")
+        return raw.decode("ascii"), hashlib.sha256(raw).hexdigest()
 
 
 class PasswordResetToken(Base):
@@ -2,43 +2,153 @@
 from __future__ import annotations
 
 import os
+import hmac
+import base64
 import hashlib
+import functools
+import time
 import datetime as dt
 from typing import Optional
+import orjson
+from argon2 import PasswordHasher
+from argon2.exceptions import InvalidHashError, VerificationError
 from jose import jwt, JWTError
-from passlib.context import CryptContext
 
-pwd_context = CryptContext(schemes=["pbkdf2_sha256"], deprecated="auto")
+from .cache import TTLCache
+
+ARGON2_TIME_COST = int(os.getenv("AUTH_ARGON2_TIME_COST", "2"))
+ARGON2_MEMORY_COST = int(os.getenv("AUTH_ARGON2_MEMORY_COST", "65536"))  # KiB
+ARGON2_PARALLELISM = int(os.getenv("AUTH_ARGON2_PARALLELISM", "1"))
+
+_password_hasher = PasswordHasher(
+    time_cost=ARGON2_TIME_COST,
+    memory_cost=ARGON2_MEMORY_COST,
+    parallelism=ARGON2_PARALLELISM,
+)
+_ARGON2_PREFIX = "$argon2"
+
+# Hashes written by the previous passlib-based implementation. They are
+# verify-only and get upgraded to Argon2 on the next successful login.
+_PASSLIB_PREFIX = "$pbkdf2-sha256$"
 
 JWT_SECRET = os.getenv("AUTH_JWT_SECRET", "dev-insecure-secret-change")
 JWT_ALGO = "HS256"
 JWT_EXPIRE_MINUTES = int(os.getenv("AUTH_JWT_EXPIRE_MINUTES", "60"))
+JWT_CACHE_SIZE = int(os.getenv("AUTH_JWT_CACHE_SIZE", "10000"))
+
+# Tokens are signed here directly; the fixed header and the HMAC key schedule
+# are prepared once and only the claims are serialized per token.
+_JWT_HEADER_B64 = base64.urlsafe_b64encode(b'{"alg":"HS256","typ":"JWT"}').rstrip(b"=")
+_jwt_signer = hmac.new(JWT_SECRET.encode("utf-8"), digestmod=hashlib.sha256)
+
+# Verified token -> subject. Entries live until the token's own ``exp``.
+_token_cache = TTLCache(maxsize=JWT_CACHE_SIZE, ttl=JWT_EXPIRE_MINUTES * 60)
 
 API_KEY_HASH_ALGO = "sha256"
 
 RESET_TOKEN_EXPIRE_MINUTES = int(os.getenv("AUTH_RESET_EXPIRE_MINUTES", "30"))
 
 
+def _pbkdf2(password: str, salt: bytes, iterations: int, dklen: int) -> bytes:
+    # Standard PBKDF2-HMAC-SHA256 (RFC 8018) for every key length.
+    return hashlib.pbkdf2_hmac("sha256", password.encode("utf-8"), salt, iterations, dklen)
+
+
+def _ab64_decode(data: str) -> bytes:
+    """Decode passlib's adapted base64 (``.`` for ``+``, no padding)."""
+    data = data.replace(".", "+")
+    return base64.b64decode(data + "=" * (-len(data) % 4))
+
+
+@functools.lru_cache(maxsize=4096)
+def _parse_password_hash(hashed: str) -> tuple[int, bytes, bytes]:
+    """Split a passlib ``$pbkdf2-sha256$...`` hash into ``(iterations, salt, digest)``.
+
+    Memoized so repeated logins skip the split and base64 decoding. Raises
+    ValueError for unrecognised hashes.
+    """
+    if not hashed.startswith(_PASSLIB_PREFIX):
+        raise ValueError("unsupported password hash format")
+    iterations, salt_b64, digest_b64 = hashed[len(_PASSLIB_PREFIX):].split("$")
+    return int(iterations), _ab64_decode(salt_b64), _ab64_decode(digest_b64)
+
+
+def _verify_pbkdf2(password: str, hashed: str) -> bool:
+    """Verify a legacy passlib PBKDF2 hash."""
+    try:
+        iterations, salt, expected = _parse_password_hash(hashed)
+        candidate = _pbkdf2(password, salt, iterations, len(expected))
+    except (ValueError, TypeError):
+        return False
+    return hmac.compare_digest(candidate, expected)
+
+
+def _is_argon2(hashed: str) -> bool:
+    return hashed.startswith(_ARGON2_PREFIX)
+
+
 def hash_password(password: str) -> str:
-    return pwd_context.hash(password)
+    """Hash a password with Argon2id (encoded ``$argon2id$...`` string)."""
+    return _password_hasher.hash(password)
 
 
 def verify_password(password: str, hashed: str) -> bool:
-    return pwd_context.verify(password, hashed)
+    """Check a password against a stored Argon2 or legacy passlib PBKDF2 hash."""
+    if not _is_argon2(hashed):
+        return _verify_pbkdf2(password, hashed)
+    try:
+        return _password_hasher.verify(hashed, password)
+    except (VerificationError, InvalidHashError):
+        return False
+
+
+def password_needs_rehash(hashed: str) -> bool:
+    """True for legacy passlib PBKDF2 hashes or Argon2 hashes with outdated parameters."""
+    return not _is_argon2(hashed) or _password_hasher.check_needs_rehash(hashed)
+
+
+def _b64_nopad(data: bytes) -> str:
+    return base64.b64encode(data).decode("ascii").rstrip("=")
+
+
+# Well-formed hash that no password matches. Verifying against it costs the
+# same as a real account, so unknown usernames can't be told apart by timing.
+DUMMY_PASSWORD_HASH = (
+    f"$argon2id$v=19$m={ARGON2_MEMORY_COST},t={ARGON2_TIME_COST},p={ARGON2_PARALLELISM}"
+    f"${_b64_nopad(os.urandom(_password_hasher.salt_len))}"
+    f"${_b64_nopad(os.urandom(_password_hasher.hash_len))}"
+)
 
 
 def create_access_token(sub: str) -> str:
-    expire = dt.datetime.now(dt.UTC) + dt.timedelta(minutes=JWT_EXPIRE_MINUTES)
-    to_encode = {"sub": sub, "exp": expire}
-    return jwt.encode(to_encode, JWT_SECRET, algorithm=JWT_ALGO)
+    # Numeric epoch seconds are what the ``exp`` claim holds on the wire anyway.
+    claims = orjson.dumps({"sub": sub, "exp": int(time.time()) + JWT_EXPIRE_MINUTES * 60})
+    signing_input = _JWT_HEADER_B64 + b"." + base64.urlsafe_b64encode(claims).rstrip(b"=")
+    signer = _jwt_signer.copy()
+    signer.update(signing_input)
+    signature = base64.urlsafe_b64encode(signer.digest()).rstrip(b"=")
+    return (signing_input + b"." + signature).decode("ascii")
 
 
 def decode_access_token(token: str) -> Optional[str]:
+    """Return the token subject, or None if the token is invalid or expired.
+
+    Successfully verified tokens are cached until their ``exp`` claim so
+    repeat requests skip signature verification; invalid tokens are never
+    cached.
+    """
+    sub = _token_cache.get(token)
+    if sub is not None:
+        return sub
     try:
         payload = jwt.decode(token, JWT_SECRET, algorithms=[JWT_ALGO])
-        return payload.get("sub")
     except JWTError:
         return None
+    sub = payload.get("sub")
+    exp = payload.get("exp")
+    if sub and isinstance(exp, (int, float)):
+        _token_cache.set(token, sub, ttl=exp - time.time())
+    return sub
 
 
 def hash_api_key(raw_key: str) -> str:
@@ -46,12 +156,14 @@ def hash_api_key(raw_key: str) -> str:
 
 
 def create_reset_expiry() -> dt.datetime:
-    return dt.datetime.now(dt.UTC) + dt.timedelta(minutes=RESET_TOKEN_EXPIRE_MINUTES)
+    return dt.datetime.fromtimestamp(time.time() + RESET_TOKEN_EXPIRE_MINUTES * 60, dt.UTC)
 
 
 __all__ = [
+    "DUMMY_PASSWORD_HASH",
     "hash_password",
     "verify_password",
+    "password_needs_rehash",
     "create_access_token",
     "decode_access_token",
     "hash_api_key",
@@ -0,0 +1,6 @@
+import os
+
+# Cheapest valid Argon2 parameters for test runs; auth.security reads these
+# at import, which happens after conftest loads. Deployments are unaffected.
+os.environ.setdefault("AUTH_ARGON2_TIME_COST", "1")
+os.environ.setdefault("AUTH_ARGON2_MEMORY_COST", "8")
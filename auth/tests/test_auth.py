@@ -63,6 +63,9 @@ def test_register_and_login(app_client):
     bad_login = client.post(
         "/auth/login", json={"username": "testuser", "password": "Wrong"})
     assert bad_login.status_code == 400
+    unknown_login = client.post(
+        "/auth/login", json={"username": "nosuchuser", "password": "StrongPass123!"})
+    assert unknown_login.status_code == 400
     me = client.get("/auth/me", headers={"Authorization": f"Bearer {token}"})
     assert me.status_code == 200
     assert me.json()["username"] == "testuser"
@@ -84,6 +87,10 @@ def test_apikey_flow(app_client):
         "/auth/apikeys", headers={"Authorization": f"Bearer {token}"})
     assert create.status_code == 200, create.text
     key_id = create.json()["id"]
+    from auth.models import APIKey
+    from auth.security import hash_api_key
+    raw_key, key_hash = APIKey.generate_raw_key()
+    assert hash_api_key(raw_key) == key_hash
     list_keys = client.get(
         "/auth/apikeys", headers={"Authorization": f"Bearer {token}"})
     keys = list_keys.json()
@@ -127,3 +134,143 @@ def test_password_reset_flow(app_client, monkeypatch):
     login_old = client.post(
         "/auth/login", json={"username": "resetuser", "password": "OriginalPass1!"})
     assert login_old.status_code == 400
+    reused = client.post("/auth/password-reset/confirm",
+                         json={"token": reset_token, "new_password": "OtherPass789!"})
+    assert reused.status_code == 400
+    import asyncio
+    assert asyncio.run(api_mod.purge_reset_tokens()) >= 1
+
+
+def _passlib_pbkdf2_hash(password: str) -> str:
+    import base64
+    import hashlib
+    import os
+    salt, iterations = os.urandom(16), 1000
+    digest = hashlib.pbkdf2_hmac("sha256", password.encode(), salt, iterations, 32)
+
+    def ab64(data: bytes) -> str:
+        return base64.b64encode(data).decode().rstrip("=").replace("+", ".")
+    return f"$pbkdf2-sha256${iterations}${ab64(salt)}${ab64(digest)}"
+
+
+def test_password_hashing_accepts_legacy_hashes():
+    from auth.security import DUMMY_PASSWORD_HASH, hash_password, verify_password, password_needs_rehash
+    hashed = hash_password("StrongPass123!")
+    assert hashed.startswith("$argon2id$")
+    assert verify_password("StrongPass123!", hashed)
+    assert not verify_password("Wrong", hashed)
+    assert not password_needs_rehash(hashed)
+    legacy = "$pbkdf2-sha256$29000$BSCEMEbo/d/7f48xxljrnQ$Bx8sLHLwyIKW/0obTYFB7WwG8jDHB/WdVJIH4o27BiQ"
+    assert verify_password("x", legacy)
+    assert not verify_password("y", legacy)
+    assert password_needs_rehash(legacy)
+    assert verify_password("StrongPass123!", _passlib_pbkdf2_hash("StrongPass123!"))
+    assert not verify_password("x", "garbage")
+    assert not verify_password("StrongPass123!", DUMMY_PASSWORD_HASH)
+
+
+def test_login_upgrades_legacy_hash(app_client):
+    from sqlalchemy import select
+    import auth.database as database
+    from auth.models import User
+    client = app_client
+    client.post("/auth/register", json={
+        "name": "Legacy User",
+        "email": "legacy@example.com",
+        "address": "3 Old Rd",
+        "username": "legacyuser",
+        "password": "StrongPass123!",
+    })
+    with database.SessionLocal() as db:
+        user = db.scalar(select(User).where(User.username == "legacyuser"))
+        user.password_hash = _passlib_pbkdf2_hash("StrongPass123!")
+        db.commit()
+    login = client.post(
+        "/auth/login", json={"username": "legacyuser", "password": "StrongPass123!"})
+    assert login.status_code == 200, login.text
+    with database.SessionLocal() as db:
+        user = db.scalar(select(User).where(User.username == "legacyuser"))
+        assert user.password_hash.startswith("$argon2id$")
+
+
+def test_access_token_cache_respects_expiry(monkeypatch):
+    import auth.security as security
+    token = security.create_access_token(sub="cacheuser")
+    claims = security.jwt.decode(
+        token, security.JWT_SECRET, algorithms=[security.JWT_ALGO])
+    assert claims["sub"] == "cacheuser"
+    assert security.decode_access_token(token) == "cacheuser"
+    assert security._token_cache.get(token) == "cacheuser"
+    assert security.decode_access_token(token + "x") is None
+    assert security._token_cache.get(token + "x") is None
+    # An expired cache entry falls back to full verification.
+    monkeypatch.setattr(security.time, "monotonic", lambda: float("inf"))
+    assert security._token_cache.get(token) is None
+
+
+def test_login_lists_only_active_api_keys(app_client):
+    client = app_client
+    client.post("/auth/register", json={
+        "name": "Keys User",
+        "email": "keys@example.com",
+        "address": "2 Key Way",
+        "username": "keysuser",
+        "password": "StrongPass123!",
+    })
+    creds = {"username": "keysuser", "password": "StrongPass123!"}
+    token = client.post("/auth/login", json=creds).json()["access_token"]
+    headers = {"Authorization": f"Bearer {token}"}
+    kept = client.post("/auth/apikeys", headers=headers).json()["id"]
+    revoked = client.post("/auth/apikeys", headers=headers).json()["id"]
+    client.delete(f"/auth/apikeys/{revoked}", headers=headers)
+    login = client.post("/auth/login", json=creds)
+    assert login.json()["api_keys"] == [str(kept)]
+
+
+def test_async_url_maps_sync_drivers():
+    from auth.database import _async_url
+    assert _async_url("sqlite:///./auth.db") == "sqlite+aiosqlite:///./auth.db"
+    assert _async_url("postgresql+psycopg2://u@h/db") == "postgresql+asyncpg://u@h/db"
+    assert _async_url("postgresql+psycopg://u@h/db") == "postgresql+psycopg://u@h/db"
+    with pytest.raises(RuntimeError, match="AUTH_ASYNC_DB_URL"):
+        _async_url("mysql://u@h/db")
+
+
+def test_stale_user_id_cache_is_re_resolved(app_client):
+    import auth.api as api_mod
+    client = app_client
+    client.post("/auth/register", json={
+        "name": "Stale User",
+        "email": "stale@example.com",
+        "address": "4 Cache Ct",
+        "username": "staleuser",
+        "password": "StrongPass123!",
+    })
+    token = client.post("/auth/login", json={
+        "username": "staleuser", "password": "StrongPass123!"}).json()["access_token"]
+    api_mod._user_id_cache.set("staleuser", 10**9)
+    me = client.get("/auth/me", headers={"Authorization": f"Bearer {token}"})
+    assert me.status_code == 200, me.text
+    assert me.json()["username"] == "staleuser"
+    assert api_mod._user_id_cache.get("staleuser") == me.json()["id"]
+
+
+def test_ttl_cache_evicts_from_the_front(monkeypatch):
+    import auth.cache as cache_mod
+    now = [0.0]
+    monkeypatch.setattr(cache_mod.time, "monotonic", lambda: now[0])
+    cache = cache_mod.TTLCache(maxsize=3, ttl=100)
+    cache.set("a", 1, ttl=1)
+    cache.set("b", 2, ttl=1)
+    cache.set("c", 3)
+    cache.set("a", 1)  # refreshed: now the newest entry
+    assert list(cache._data) == ["b", "c", "a"]
+    cache.set("d", 4)  # full: the oldest entry goes, expired or not
+    assert list(cache._data) == ["c", "a", "d"]
+    cache.set("e", 5, ttl=1)
+    cache.set("f", 6, ttl=1)
+    cache.set("g", 7)
+    now[0] = 5.0
+    # Expired entries at the front go along with the one making room.
+    cache.set("h", 8)
+    assert list(cache._data) == ["g", "h"]
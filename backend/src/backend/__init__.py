@@ -1,4 +1,18 @@
 """Backend package (src layout)."""
-from .conversion import convert_metar_tac, ConversionError  # re-export
+from .conversion import (  # re-export
+    convert_metar_tac,
+    convert_metar_tac_sized,
+    convert_metar_tac_bytes,
+    convert_many,
+    gifts_available,
+    ConversionError,
+)
 
-__all__ = ["convert_metar_tac", "ConversionError"]
+__all__ = [
+    "convert_metar_tac",
+    "convert_metar_tac_sized",
+    "convert_metar_tac_bytes",
+    "convert_many",
+    "gifts_available",
+    "ConversionError",
+]
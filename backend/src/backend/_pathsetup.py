@@ -0,0 +1,68 @@
+"""One-time sys.path setup for the GIFTs checkout (src layout).
+
+Appends rather than prepends: nothing in GIFTs needs to shadow installed
+packages, and the front of sys.path stays the interpreter's own.
+"""
+from __future__ import annotations
+
+import os
+import pathlib
+import sys
+from typing import Optional
+
+_gifts_path: Optional[str] = None
+
+
+def _append_path(path: str) -> str:
+    if path not in sys.path:
+        sys.path.append(path)
+    return path
+
+
+def ensure_gifts_on_path() -> str:
+    """Resolve the GIFTs directory, add it to sys.path once, and return it.
+
+    ``GIFTS_PATH`` (set in the Docker images) names the directory directly.
+    Without it we handle both source layout (running from repo) and installed
+    package layout inside a container (site-packages) by trying several
+    plausible ancestor locations plus the explicit /app path.
+    """
+    global _gifts_path
+    if _gifts_path is not None:
+        return _gifts_path
+
+    explicit = os.environ.get("GIFTS_PATH")
+    if explicit:
+        if not os.path.isdir(explicit):
+            raise ImportError(f"GIFTS_PATH={explicit} is not a directory.")
+        _gifts_path = _append_path(explicit)
+        return _gifts_path
+
+    file_path = pathlib.Path(__file__).resolve()
+    candidates = []
+
+    # Ancestor traversals: parents[0] .. parents[5] (defensive upper bound)
+    for depth in range(0, 6):  # pragma: no cover (loop logic simple)
+        try:
+            parent = file_path.parents[depth]
+        except IndexError:
+            break
+        candidates.append(parent / "GIFTs")
+
+    # Explicit Docker workdir copy location
+    candidates.append(pathlib.Path("/app/GIFTs"))
+
+    for cand in candidates:
+        if cand.exists():
+            _gifts_path = _append_path(str(cand))
+            return _gifts_path
+
+    # If we reach here, none of the candidates existed.
+    raise ImportError(
+        "GIFTs submodule not found in any expected location. "
+        "Tried: " + ", ".join(str(c) for c in candidates)
+    )
+
+
+
+__all__ = ["ensure_gifts_on_path"]
@@ -1,30 +1,31 @@
 """Standalone backend API module for Docker deployment (src layout)."""
 from __future__ import annotations
 
-from fastapi import FastAPI, UploadFile, File, Form, HTTPException
-from fastapi.responses import StreamingResponse
+from fastapi import FastAPI, UploadFile, File, Form, HTTPException, Request
+from fastapi.responses import Response, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel, Field, ConfigDict
 from typing import List, Optional
-import pathlib
-import sys
-import io
-import zipfile
+import contextlib
 import datetime
-
-# Add repository root to path
-ROOT = pathlib.Path(__file__).resolve().parents[3]
-if str(ROOT) not in sys.path:
-    sys.path.insert(0, str(ROOT))
+import orjson
 
 try:
-    from backend.conversion import convert_metar_tac, ConversionError
+    from backend.conversion import (
+        convert_metar_tac_bytes,
+        gifts_available,
+        start_process_pool,
+        shutdown_process_pool,
+    )
+    from backend.archive import Compression, stream_zip
+    from backend.uploads import convert_uploads
 except Exception as e:  # pragma: no cover
     raise RuntimeError(f"Failed to import conversion module: {e}") from e
 
 
 class ConversionResult(BaseModel):
     model_config = ConfigDict(
+        frozen=True,
         json_schema_extra={
             "example": {
                 "name": "KJFK_231751Z.txt",
@@ -47,6 +48,7 @@ class ConversionResult(BaseModel):
 
 class ConversionResponse(BaseModel):
     model_config = ConfigDict(
+        frozen=True,
         json_schema_extra={
             "example": {
                 "results": [
@@ -73,21 +75,49 @@ class ConversionResponse(BaseModel):
 
 
 class ErrorDetail(BaseModel):
+    """Shape of the 400 ``detail`` payload; endpoints build it as a plain dict."""
+    model_config = ConfigDict(frozen=True)
+
     message: str
     errors: List[str] = Field(default_factory=list)
     total_errors: int = Field(..., ge=0)
 
 
 class HealthResponse(BaseModel):
+    model_config = ConfigDict(frozen=True)
+
     status: str
     version: str
     gifts_available: bool
 
 
+# Output models are frozen, so the two possible health payloads are built once.
+_HEALTHY = HealthResponse(status="healthy", version="0.1.0", gifts_available=True)
+_DEGRADED = HealthResponse(status="degraded", version="0.1.0", gifts_available=False)
+
+
+@contextlib.asynccontextmanager
+async def lifespan(app: FastAPI):
+    # None when CONVERT_WORKERS=0 (conversions stay on the thread pool).
+    pool = app.state.pool = start_process_pool()
+    try:
+        yield
+    finally:
+        if app.state.pool is pool:
+            app.state.pool = None
+        shutdown_process_pool(pool)
+
+
+def _app_pool(request: Request):
+    # Absent when the lifespan never ran (e.g. mounted under another app).
+    return getattr(request.app.state, "pool", None)
+
+
 app = FastAPI(
     title="METAR to IWXXM Backend API",
     version="0.1.0",
     description="Convert METAR/SPECI TAC messages to IWXXM XML format (backend only)",
+    lifespan=lifespan,
 )
 
 app.add_middleware(
@@ -101,127 +131,73 @@ app.add_middleware(
 
 @app.get("/health", response_model=HealthResponse, tags=["Health"])
 def health() -> HealthResponse:
-    try:
-        test_metar = "METAR KJFK 231751Z 18012KT 10SM FEW040 15/07 A3005"
-        _ = convert_metar_tac(test_metar)
-        gifts_available = True
-        status = "healthy"
-    except Exception:
-        gifts_available = False
-        status = "degraded"
-    return HealthResponse(status=status, version="0.1.0", gifts_available=gifts_available)
+    return _HEALTHY if gifts_available() else _DEGRADED
 
 
-@app.post("/api/convert", response_model=ConversionResponse, tags=["Conversion"])
+@app.post(
+    "/api/convert",
+    response_model=None,
+    responses={200: {"model": ConversionResponse}},
+    tags=["Conversion"],
+)
 async def convert(
+    request: Request,
     files: List[UploadFile] = File(default=[], description="METAR TAC files"),
     manual_text: str = Form(default="", description="Manual METAR text"),
-) -> ConversionResponse:
-    results: List[ConversionResult] = []
-    errors: List[str] = []
-    total_inputs = 0
-
-    if manual_text.strip():
-        total_inputs += 1
-        try:
-            xml_text = convert_metar_tac(manual_text.strip())
-            results.append(
-                ConversionResult(
-                    name="manual_input.txt",
-                    content=xml_text,
-                    source="manual",
-                    size_bytes=len(xml_text.encode("utf-8")),
-                )
-            )
-        except ConversionError as e:
-            errors.append(f"manual_input: {e}")
-
-    for uf in files:
-        total_inputs += 1
-        try:
-            data = (await uf.read()).decode("utf-8", errors="ignore")
-            if not data.strip():
-                errors.append(f"{uf.filename}: empty file")
-                continue
-            xml_text = convert_metar_tac(data)
-            out_name = pathlib.Path(uf.filename or "unknown").stem + ".txt"
-            results.append(
-                ConversionResult(
-                    name=out_name,
-                    content=xml_text,
-                    source=uf.filename,
-                    size_bytes=len(xml_text.encode("utf-8")),
-                )
-            )
-        except ConversionError as e:
-            errors.append(f"{uf.filename}: {e}")
-        except Exception as e:
-            errors.append(f"{uf.filename}: unexpected error {e}")
+) -> Response:
+    # Results are built from values we produced ourselves, so they go out as
+    # plain dicts shaped like ConversionResponse and are encoded by orjson;
+    # the model is only referenced for the OpenAPI schema.
+    total_inputs = (1 if manual_text.strip() else 0) + len(files)
+    converted, errors = await convert_uploads(files, manual_text, ".txt", pool=_app_pool(request))
+    results = [
+        {"name": name, "content": xml_text, "source": source, "size_bytes": size_bytes}
+        for name, source, (xml_text, size_bytes) in converted
+    ]
 
     if not results and errors:
         raise HTTPException(
             status_code=400,
-            detail=ErrorDetail(
-                message="All conversions failed", errors=errors, total_errors=len(errors)
-            ).model_dump(),
+            detail={"message": "All conversions failed", "errors": errors, "total_errors": len(errors)},
         )
 
-    return ConversionResponse(
-        results=results,
-        errors=errors,
-        total_processed=total_inputs,
-        successful=len(results),
-        failed=len(errors),
+    return Response(
+        orjson.dumps(
+            {
+                "results": results,
+                "errors": errors,
+                "total_processed": total_inputs,
+                "successful": len(results),
+                "failed": len(errors),
+            }
+        ),
+        media_type="application/json",
     )
 
 
 @app.post("/api/convert-zip", response_class=StreamingResponse, tags=["Conversion"])
 async def convert_zip(
-    files: List[UploadFile] = File(default=[]), manual_text: str = Form(default="")
+    request: Request,
+    files: List[UploadFile] = File(default=[]),
+    manual_text: str = Form(default=""),
+    compression: Compression = Form(
+        default="auto", description="ZIP member compression: auto, stored or deflate"),
 ) -> StreamingResponse:
-    results: List[tuple[str, str]] = []
-    errors: List[str] = []
-
-    if manual_text.strip():
-        try:
-            xml_text = convert_metar_tac(manual_text.strip())
-            results.append(("manual_input.xml", xml_text))
-        except ConversionError as e:
-            errors.append(f"manual_input: {e}")
-
-    for uf in files:
-        try:
-            data = (await uf.read()).decode("utf-8", errors="ignore").strip()
-            if not data:
-                errors.append(f"{uf.filename}: empty file")
-                continue
-            xml_text = convert_metar_tac(data)
-            fname = pathlib.Path(uf.filename or "unknown").stem + ".xml"
-            results.append((fname, xml_text))
-        except ConversionError as e:
-            errors.append(f"{uf.filename}: {e}")
-        except Exception as e:
-            errors.append(f"{uf.filename}: unexpected error {e}")
+    converted, errors = await convert_uploads(
+        files, manual_text, ".xml", convert_metar_tac_bytes, _app_pool(request))
+    results = [(name, xml_bytes) for name, _, xml_bytes in converted]
 
     if not results and errors:
         raise HTTPException(
             status_code=400,
-            detail=ErrorDetail(
-                message="No valid conversions", errors=errors, total_errors=len(errors)
-            ).model_dump(),
+            detail={"message": "No valid conversions", "errors": errors, "total_errors": len(errors)},
         )
 
-    mem = io.BytesIO()
-    with zipfile.ZipFile(mem, "w", zipfile.ZIP_DEFLATED) as zf:
-        for fname, content in results:
-            zf.writestr(fname, content)
-        if errors:
-            zf.writestr("errors.txt", "\n".join(errors))
-    mem.seek(0)
-
-    stamp = datetime.datetime.now(datetime.UTC).strftime("%Y%m%dT%H%M%SZ")
+    entries = results + ([("errors.txt", "\n".join(errors))] if errors else [])
+    t = datetime.datetime.now(datetime.UTC)
+    stamp = f"{t.year:04d}{t.month:02d}{t.day:02d}T{t.hour:02d}{t.minute:02d}{t.second:02d}Z"
     return StreamingResponse(
-        mem,
+        stream_zip(entries, compression),
         media_type="application/zip",
         headers={
             "Content-Disposition": f"attachment; filename=iwxxm_batch_{stamp}.zip"},
@@ -0,0 +1,71 @@
+"""Streaming ZIP archives for conversion batches (src layout)."""
+from __future__ import annotations
+
+import collections
+import zipfile
+from typing import Iterator, List, Literal, Sequence, Tuple, Union
+
+# IWXXM text deflates well even at zlib's fastest level; batches under
+# ZIP_STORE_BELOW bytes aren't worth compressing at all.
+ZIP_COMPRESSLEVEL = 1
+ZIP_STORE_BELOW = 64 * 1024
+
+Compression = Literal["auto", "stored", "deflate"]
+
+
+class _ChunkSink:
+    """Write-only file object that hands back whatever zipfile wrote so far.
+
+    It has no ``seek``/``tell``, so zipfile writes data descriptors and never
+    rewinds; the archive can be sent while it is still being built.
+    """
+
+    def __init__(self) -> None:
+        self._chunks: List[bytes] = []
+
+    def write(self, data: bytes) -> int:
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self) -> None:
+        pass
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def stream_zip(
+    entries: Sequence[Tuple[str, Union[str, bytes]]], compression: Compression = "auto",
+) -> Iterator[bytes]:
+    """Yield a ZIP of ``(name, content)`` entries one member at a time.
+
+    ``bytes`` content is stored as-is; ``str`` content is UTF-8 encoded.
+    ``compression`` forces ``"stored"`` or ``"deflate"``; ``"auto"`` stores
+    batches under ZIP_STORE_BELOW bytes and deflates the rest.
+    Entries are released as they are written, so when the caller hands over
+    its only reference, memory shrinks while the archive streams out.
+    """
+    sink = _ChunkSink()
+    if compression == "auto":
+        small = sum(len(content) for _, content in entries) < ZIP_STORE_BELOW
+        compression = "stored" if small else "deflate"
+    if compression == "stored":
+        options = {"compression": zipfile.ZIP_STORED}
+    else:
+        options = {"compression": zipfile.ZIP_DEFLATED, "compresslevel": ZIP_COMPRESSLEVEL}
+    pending = collections.deque(entries)
+    del entries
+    with zipfile.ZipFile(sink, "w", **options) as zf:
+        while pending:
+            name, content = pending.popleft()
+            zf.writestr(name, content)
+            del content
+            chunk = sink.drain()
+            if chunk:
+                yield chunk
+    yield sink.drain()
+
+
+__all__ = ["stream_zip", "Compression"]
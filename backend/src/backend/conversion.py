@@ -1,46 +1,22 @@
 """METAR TAC -> IWXXM conversion utilities (src layout)."""
 from __future__ import annotations
 
-import pathlib
-import sys
+import asyncio
+import functools
+import io
+import multiprocessing
+import os
+import re
+import threading
+import time
+import weakref
 import xml.etree.ElementTree as ET
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, List, Optional, Sequence, Tuple, Union
 
+from ._pathsetup import ensure_gifts_on_path
 
-def _ensure_gifts_on_path() -> None:
-    """Resolve and add the GIFTs directory to sys.path.
-
-    Handles both source layout (running from repo) and installed package
-    layout inside a container (site-packages). We attempt several plausible
-    ancestor locations plus explicit /app path used in Docker builds.
-    """
-    file_path = pathlib.Path(__file__).resolve()
-    candidates = []
-
-    # Ancestor traversals: parents[0] .. parents[5] (defensive upper bound)
-    for depth in range(0, 6):  # pragma: no cover (loop logic simple)
-        try:
-            parent = file_path.parents[depth]
-        except IndexError:
-            break
-        candidates.append(parent / "GIFTs")
-
-    # Explicit Docker workdir copy location
-    candidates.append(pathlib.Path("/app/GIFTs"))
-
-    for cand in candidates:
-        if cand.exists():
-            if str(cand) not in sys.path:
-                sys.path.insert(0, str(cand))
-            return
-
-    # If we reach here, none of the candidates existed.
-    raise ImportError(
-        "GIFTs submodule not found in any expected location. "
-        "Tried: " + ", ".join(str(c) for c in candidates)
-    )
-
-
-_ensure_gifts_on_path()
+ensure_gifts_on_path()
 
 try:  # pragma: no cover
     from gifts import metarDecoder, metarEncoder  # type: ignore
@@ -48,18 +24,75 @@ except Exception:  # pragma: no cover
     metarDecoder = None  # type: ignore
     metarEncoder = None  # type: ignore
 
+try:  # optional: lxml trees serialize through libxml2
+    from lxml import etree as _lxml_etree  # type: ignore
+except ImportError:  # pragma: no cover
+    _lxml_etree = None
+
 
 class ConversionError(Exception):
     pass
 
 
-def convert_metar_tac(tac_text: str) -> str:
+# Annex3 decoder/encoder pairs keep parse state on the instance while running,
+# so each thread builds its own pair once and reuses it, along with one
+# serialization buffer.
+_local = threading.local()
+
+
+def _get_annex3():
+    pair = getattr(_local, "pair", None)
+    if pair is None:
+        pair = (metarDecoder.Annex3(),  # type: ignore[attr-defined]
+                metarEncoder.Annex3())  # type: ignore[attr-defined]
+        _local.pair = pair
+    return pair
+
+
+def _serialize(xml_root: ET.Element) -> bytes:
+    """Write ``xml_root`` as UTF-8 into this thread's reusable buffer.
+
+    GIFTs builds stdlib ElementTree trees; an lxml tree (if a GIFTs build ever
+    hands one back) goes straight to libxml2's serializer instead.
+    """
+    if _lxml_etree is not None and isinstance(xml_root, _lxml_etree._Element):
+        return _lxml_etree.tostring(xml_root, encoding="utf-8", xml_declaration=False)
+    buf = getattr(_local, "buf", None)
+    if buf is None:
+        buf = _local.buf = io.BytesIO()
+    buf.seek(0)
+    buf.truncate()
+    ET.ElementTree(xml_root).write(buf, encoding="utf-8", xml_declaration=False)
+    return buf.getvalue()
+
+
+# Every METAR/SPECI TAC carries its (upper-case) report type, possibly after a
+# WMO bulletin heading; anything else is rejected before GIFTs spends a full
+# parse on it.
+_METAR_TYPE = re.compile(r"\b(?:METAR|SPECI)\b", re.ASCII)
+
+# A METAR/SPECI report is a few hundred characters at most; longer input is
+# refused up front so a pathological upload can't drive GIFTs' regex parser.
+MAX_TAC_CHARS = int(os.getenv("MAX_TAC_CHARS", "8192"))
+
+
+# Conversion is a pure function of the TAC text, and this memo is the single
+# result cache: the str/sized wrappers call through it, and each process-pool
+# worker has its own copy. lru_cache only stores successful results; a
+# ConversionError propagates and is retried next time.
+@functools.lru_cache(maxsize=1024)
+def convert_metar_tac_bytes(tac_text: str) -> bytes:
+    """Convert ``tac_text`` and return the IWXXM XML as UTF-8 bytes."""
     if metarDecoder is None or metarEncoder is None:
         raise ConversionError(
             "GIFTs metar modules unavailable (import failed).")
+    if len(tac_text) > MAX_TAC_CHARS:
+        raise ConversionError(
+            f"Message too long ({len(tac_text)} characters; limit {MAX_TAC_CHARS}).")
+    if _METAR_TYPE.search(tac_text) is None:
+        raise ConversionError("Not a METAR/SPECI message.")
     try:
-        decoder = metarDecoder.Annex3()  # type: ignore[attr-defined]
-        encoder = metarEncoder.Annex3()  # type: ignore[attr-defined]
+        decoder, encoder = _get_annex3()
     except Exception as e:  # pragma: no cover
         raise ConversionError(
             f"Failed to construct decoder/encoder: {e}") from e
@@ -71,9 +104,148 @@ def convert_metar_tac(tac_text: str) -> str:
     if xml_root is None:
         raise ConversionError("Encoder returned None (no XML produced).")
     try:
-        return ET.tostring(xml_root, encoding="unicode")
+        # The utf-8 bytes writer is cheaper than the "unicode" text path.
+        return _serialize(xml_root)
     except Exception as e:
         raise ConversionError(f"Serialization error: {e}") from e
 
 
-__all__ = ["convert_metar_tac", "ConversionError"]
+def convert_metar_tac_sized(tac_text: str) -> tuple[str, int]:
+    """Convert ``tac_text`` and also return the XML's UTF-8 size in bytes."""
+    xml_bytes = convert_metar_tac_bytes(tac_text)
+    return xml_bytes.decode("utf-8"), len(xml_bytes)
+
+
+def convert_metar_tac(tac_text: str) -> str:
+    return convert_metar_tac_sized(tac_text)[0]
+
+
+# Known-good TAC used by health checks, and how long a probe result stands.
+HEALTH_PROBE_TAC = "METAR KJFK 231751Z 18012KT 10SM FEW040 15/07 A3005"
+HEALTH_CHECK_TTL = float(os.getenv("HEALTH_CHECK_TTL", "300"))
+_health_state: Optional[Tuple[bool, float]] = None
+_health_lock = threading.Lock()
+
+
+def gifts_available() -> bool:
+    """Return whether a probe conversion succeeds, re-probing every HEALTH_CHECK_TTL seconds.
+
+    Concurrent callers that find the result stale wait for one probe rather
+    than each running their own.
+    """
+    global _health_state
+    state = _health_state
+    if state is not None and time.monotonic() < state[1]:
+        return state[0]
+    with _health_lock:
+        state = _health_state
+        now = time.monotonic()
+        if state is None or now >= state[1]:
+            try:
+                # Bypass the memo so a re-probe really exercises GIFTs.
+                convert_metar_tac_bytes.__wrapped__(HEALTH_PROBE_TAC)
+                ok = True
+            except Exception:
+                ok = False
+            state = _health_state = (ok, now + HEALTH_CHECK_TTL)
+    return state[0]
+
+
+# Upper bound on conversions in flight at once across every batch served by
+# one event loop, so N concurrent requests don't multiply the load by N.
+CONVERT_CONCURRENCY = int(os.getenv("CONVERT_CONCURRENCY", str((os.cpu_count() or 1) * 2)))
+# asyncio primitives are bound to a loop, so the shared limit is kept per loop.
+_convert_limits: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Semaphore]" = (
+    weakref.WeakKeyDictionary())
+
+# GIFTs is pure Python, so threads share one core. Each app starts its own
+# process pool of CONVERT_WORKERS processes at startup, hands it to
+# convert_many, and shuts it down on exit; 0 keeps conversions on threads.
+CONVERT_WORKERS = int(os.getenv("CONVERT_WORKERS", str(os.cpu_count() or 1)))
+
+
+def _init_worker() -> None:
+    """Process-pool initializer: import GIFTs and run one probe conversion.
+
+    The probe builds this worker's Annex3 pair and primes GIFTs' own lazy
+    state (and the worker's memo), so the first real request doesn't pay it.
+    """
+    if metarDecoder is not None and metarEncoder is not None:
+        try:
+            convert_metar_tac_sized(HEALTH_PROBE_TAC)
+        except Exception:
+            pass
+
+
+def _ready() -> None:
+    pass
+
+
+def start_process_pool(max_workers: Optional[int] = None) -> Optional[ProcessPoolExecutor]:
+    """Start a conversion process pool owned by the caller.
+
+    Returns None when no workers are configured. The caller passes the pool
+    to ``convert_many`` and releases it with ``shutdown_process_pool``.
+    """
+    workers = CONVERT_WORKERS if max_workers is None else max_workers
+    if workers <= 0:
+        return None
+    # spawn: forking a process that already runs the event loop's threads
+    # is unsafe.
+    pool = ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=_init_worker,
+    )
+    # Workers spawn on demand; one trivial task each starts them (and their
+    # warm-up) now rather than on the first conversions.
+    for _ in range(workers):
+        pool.submit(_ready)
+    return pool
+
+
+def shutdown_process_pool(pool: Optional[ProcessPoolExecutor]) -> None:
+    if pool is not None:
+        pool.shutdown(cancel_futures=True)
+
+
+async def convert_many(
+    tac_texts: Sequence[str], convert: Optional[Callable[[str], object]] = None,
+    pool: Optional[ProcessPoolExecutor] = None,
+) -> List[Union[Tuple[str, int], bytes, BaseException]]:
+    """Convert several TAC strings off the event loop, preserving order.
+
+    Each entry is whatever ``convert`` returns (by default
+    ``convert_metar_tac_sized``'s ``(xml_text, size_bytes)``; pass
+    ``convert_metar_tac_bytes`` for raw XML bytes) or the exception that
+    conversion raised, so one bad input doesn't abort the batch. Identical
+    inputs within the batch are converted once and share the outcome. Work
+    goes to ``pool`` when one is given (see ``start_process_pool``), else to
+    the loop's default thread pool.
+    """
+    convert = convert or convert_metar_tac_sized
+    loop = asyncio.get_running_loop()
+    limit = _convert_limits.get(loop)
+    if limit is None:
+        limit = _convert_limits[loop] = asyncio.Semaphore(CONVERT_CONCURRENCY)
+
+    async def _one(tac_text: str):
+        async with limit:
+            return await loop.run_in_executor(pool, convert, tac_text)
+
+    unique = list(dict.fromkeys(tac_texts))
+    outcomes = await asyncio.gather(*(_one(t) for t in unique), return_exceptions=True)
+    by_text = dict(zip(unique, outcomes))
+    return [by_text[t] for t in tac_texts]
+
+
+__all__ = [
+    "convert_metar_tac",
+    "convert_metar_tac_sized",
+    "convert_metar_tac_bytes",
+    "convert_many",
+    "gifts_available",
+    "start_process_pool",
+    "shutdown_process_pool",
+    "ConversionError",
+]
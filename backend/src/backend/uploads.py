@@ -0,0 +1,109 @@
+"""Upload reading, batch conversion and output naming shared by the backend and GUI apps (src layout)."""
+from __future__ import annotations
+
+import asyncio
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, List, Optional, Tuple, Union
+
+from fastapi import UploadFile
+
+from .conversion import ConversionError, convert_many
+
+# TAC uploads are short text messages; anything larger is rejected unread.
+MAX_UPLOAD_BYTES = int(os.getenv("MAX_UPLOAD_BYTES", str(1024 * 1024)))
+_UPLOAD_CHUNK_BYTES = 64 * 1024
+
+
+async def read_upload_text(uf: UploadFile) -> str:
+    """Read an upload chunk by chunk (rejecting files over MAX_UPLOAD_BYTES), then decode and strip it."""
+    # Starlette records the spooled size, so empty and oversized uploads are
+    # settled without reading them.
+    if uf.size == 0:
+        return ""
+    if uf.size is not None and uf.size > MAX_UPLOAD_BYTES:
+        raise ConversionError(f"file exceeds {MAX_UPLOAD_BYTES} bytes")
+    chunks: List[bytes] = []
+    size = 0
+    while chunk := await uf.read(_UPLOAD_CHUNK_BYTES):
+        size += len(chunk)
+        if size > MAX_UPLOAD_BYTES:
+            raise ConversionError(f"file exceeds {MAX_UPLOAD_BYTES} bytes")
+        chunks.append(chunk)
+    data = b"".join(chunks)
+    # TAC is ASCII by specification; only stray non-ASCII input pays for the
+    # lenient UTF-8 decode.
+    text = data.decode("ascii") if data.isascii() else data.decode("utf-8", errors="ignore")
+    return text.strip()
+
+
+async def read_uploads(files: List[UploadFile]) -> List[Union[str, BaseException]]:
+    """Read every upload concurrently as stripped UTF-8 text (or the error raised)."""
+    return await asyncio.gather(*(read_upload_text(uf) for uf in files), return_exceptions=True)
+
+
+def output_name(filename: Optional[str], suffix: str) -> str:
+    """``pathlib.Path(filename).stem + suffix`` without building a Path.
+
+    Backslashes count as separators too, so a Windows-style client path
+    can't smuggle ``..\\`` components into a ZIP member name.
+    """
+    name = (filename or "unknown").replace("\\", "/").rstrip("/").rpartition("/")[2]
+    stem, _, ext = name.rpartition(".")
+    return (stem if stem and ext else name) + suffix
+
+
+async def convert_uploads(
+    files: List[UploadFile], manual_text: str, suffix: str,
+    convert: Optional[Callable[[str], object]] = None,
+    pool: Optional[ProcessPoolExecutor] = None,
+) -> Tuple[List[Tuple[str, str, object]], List[str]]:
+    """Read and convert the manual text plus every upload in one batch.
+
+    Returns ``(results, errors)``: each result is ``(output name, source,
+    convert's output)`` with the name ending in ``suffix`` and the source
+    ``"manual"`` or the upload's filename; each error is a
+    ``"<source>: <reason>"`` line. An unexpected failure converting the
+    manual text is re-raised.
+    """
+    results: List[Tuple[str, str, object]] = []
+    errors: List[str] = []
+    manual = manual_text.strip()
+
+    texts = await read_uploads(files)
+    batch = [manual] if manual else []
+    batch += [t for t in texts if isinstance(t, str) and t]
+    outcomes = iter(await convert_many(batch, convert, pool))
+
+    if manual:
+        outcome = next(outcomes)
+        if isinstance(outcome, ConversionError):
+            errors.append(f"manual_input: {outcome}")
+        elif isinstance(outcome, BaseException):
+            raise outcome
+        else:
+            results.append(("manual_input" + suffix, "manual", outcome))
+
+    for uf, data in zip(files, texts):
+        prefix = f"{uf.filename}: "
+        if isinstance(data, ConversionError):
+            errors.append(prefix + str(data))
+            continue
+        if isinstance(data, BaseException):
+            errors.append(prefix + "unexpected error " + str(data))
+            continue
+        if not data:
+            errors.append(prefix + "empty file")
+            continue
+        outcome = next(outcomes)
+        if isinstance(outcome, ConversionError):
+            errors.append(prefix + str(outcome))
+        elif isinstance(outcome, BaseException):
+            errors.append(prefix + "unexpected error " + str(outcome))
+        else:
+            results.append((output_name(uf.filename, suffix), uf.filename, outcome))
+
+    return results, errors
+
+
+__all__ = ["MAX_UPLOAD_BYTES", "read_upload_text", "read_uploads", "output_name", "convert_uploads"]
@@ -1,5 +1,8 @@
 from backend.api import app
-import io
+import backend.api as api
+import backend.uploads as uploads
+import pytest
+import tempfile
 import zipfile
 import sys
 import pathlib
@@ -16,6 +19,22 @@ if str(ROOT) not in sys.path:
 
 client = TestClient(app)
 
+_CHUNK = 64 * 1024
+
+
+def _post_zip(**kwargs):
+    """POST to /api/convert-zip, spooling the body to a temp file in chunks.
+
+    Returns ``(response, file)``; the caller opens the file with ``ZipFile``,
+    which seeks to the central directory instead of holding the whole archive.
+    """
+    tmp = tempfile.TemporaryFile()
+    with client.stream("POST", "/api/convert-zip", **kwargs) as r:
+        for chunk in r.iter_bytes(_CHUNK):
+            tmp.write(chunk)
+    tmp.seek(0)
+    return r, tmp
+
 SAMPLE_METAR = "METAR KJFK 231751Z 18012KT 10SM FEW040 15/07 A3005"
 SAMPLE_METAR_2 = "METAR KLAX 231753Z 25008KT 10SM FEW020 18/12 A2992"
 
@@ -70,12 +89,47 @@ def test_zip_conversion():
         ("files", ("m1.tac", SAMPLE_METAR, "text/plain")),
         ("files", ("m2.tac", SAMPLE_METAR_2, "text/plain")),
     ]
-    r = client.post("/api/convert-zip", files=files)
+    r, tmp = _post_zip(files=files)
     assert r.status_code == 200
     assert r.headers.get("content-type") == "application/zip"
-    zbytes = io.BytesIO(r.content)
-    with zipfile.ZipFile(zbytes) as zf:
+    with tmp, zipfile.ZipFile(tmp) as zf:
         names = set(zf.namelist())
         assert any(n.endswith(".xml") for n in names)
         xml_files = [n for n in names if n.endswith(".xml")]
         assert len(xml_files) >= 2
+
+
+def test_oversized_upload_rejected(monkeypatch):
+    monkeypatch.setattr(uploads, "MAX_UPLOAD_BYTES", 16)
+    files = [("files", ("big.tac", "METAR " + "X" * 32, "text/plain"))]
+    r = client.post("/api/convert", files=files)
+    assert r.status_code == 400
+    detail = r.json()["detail"]
+    assert detail["errors"] == ["big.tac: file exceeds 16 bytes"]
+    assert detail["total_errors"] == 1
+
+
+def _fake_xml(tac_text):
+    return ("<iwxxm:METAR>" + tac_text + "</iwxxm:METAR>").encode()
+
+
+@pytest.mark.parametrize("compression,expected", [
+    ("stored", zipfile.ZIP_STORED),
+    ("deflate", zipfile.ZIP_DEFLATED),
+    ("auto", zipfile.ZIP_STORED),  # a two-report batch is under ZIP_STORE_BELOW
+])
+def test_zip_compression_field(monkeypatch, compression, expected):
+    monkeypatch.setattr(api, "convert_metar_tac_bytes", _fake_xml)
+    files = [("files", ("m1.tac", SAMPLE_METAR, "text/plain"))]
+    r, tmp = _post_zip(files=files, data={"manual_text": SAMPLE_METAR_2,
+                                          "compression": compression})
+    assert r.status_code == 200
+    with tmp, zipfile.ZipFile(tmp) as zf:
+        assert {i.compress_type for i in zf.infolist()} == {expected}
+        assert zf.read("m1.xml") == _fake_xml(SAMPLE_METAR)
+
+
+def test_zip_compression_field_rejects_unknown():
+    r = client.post("/api/convert-zip",
+                    data={"manual_text": SAMPLE_METAR, "compression": "zstd"})
+    assert r.status_code == 422
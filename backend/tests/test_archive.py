@@ -0,0 +1,39 @@
+from backend.archive import stream_zip
+import io
+import zipfile
+import sys
+import pathlib
+
+# Ensure src layout path precedence for imports
+ROOT = pathlib.Path(__file__).resolve().parents[2]
+BACKEND_SRC = ROOT / "backend" / "src"
+if str(BACKEND_SRC) not in sys.path:
+    sys.path.insert(0, str(BACKEND_SRC))
+
+
+def test_stream_zip_round_trip():
+    entries = [("a.xml", "<a/>"), ("b.xml", "<b>" + "x" * 5000 + "</b>"),
+               ("errors.txt", "c.txt: empty file")]
+    chunks = list(stream_zip(entries))
+    assert len(chunks) > 1
+    zf = zipfile.ZipFile(io.BytesIO(b"".join(chunks)))
+    assert zf.testzip() is None
+    assert zf.namelist() == ["a.xml", "b.xml", "errors.txt"]
+    assert zf.read("b.xml").decode() == entries[1][1]
+    assert all(i.compress_type == zipfile.ZIP_STORED for i in zf.infolist())
+
+
+def test_stream_zip_deflates_large_batches():
+    entries = [(f"{i}.xml", "<metar>" + "y" * 4096 + "</metar>") for i in range(20)]
+    zf = zipfile.ZipFile(io.BytesIO(b"".join(stream_zip(entries))))
+    assert zf.testzip() is None
+    assert all(i.compress_type == zipfile.ZIP_DEFLATED for i in zf.infolist())
+
+
+def test_stream_zip_honours_forced_compression():
+    small = [("a.xml", "<a/>")]
+    large = [(f"{i}.xml", "<metar>" + "y" * 4096 + "</metar>") for i in range(20)]
+    deflated = zipfile.ZipFile(io.BytesIO(b"".join(stream_zip(small, "deflate"))))
+    stored = zipfile.ZipFile(io.BytesIO(b"".join(stream_zip(large, "stored"))))
+    assert deflated.infolist()[0].compress_type == zipfile.ZIP_DEFLATED
+    assert all(i.compress_type == zipfile.ZIP_STORED for i in stored.infolist())
@@ -1,6 +1,14 @@
 from backend.conversion import convert_metar_tac, ConversionError
+import backend.conversion as conversion
+import asyncio
+import functools
 import sys
 import pathlib
+import threading
+import time
+import types
+
+import pytest
 
 # Ensure src layout path precedence
 ROOT = pathlib.Path(__file__).resolve().parents[2]
@@ -20,3 +28,137 @@ except ConversionError as e:
     print("ConversionError:", e)
 except Exception as e:
     print("Unexpected error:", e)
+
+
+def test_convert_many_converts_duplicates_once(monkeypatch):
+    calls = []
+
+    def fake_convert(tac_text):
+        calls.append(tac_text)
+        if tac_text == "BAD":
+            raise ConversionError("bad")
+        return f"<{tac_text}/>", len(tac_text) + 3
+
+    monkeypatch.setattr(conversion, "convert_metar_tac_sized", fake_convert)
+    outcomes = asyncio.run(conversion.convert_many(["A", "BAD", "A", "B"]))
+    assert sorted(calls) == ["A", "B", "BAD"]
+    assert outcomes[0] == outcomes[2] == ("<A/>", 4)
+    assert isinstance(outcomes[1], ConversionError)
+    assert outcomes[3] == ("<B/>", 4)
+
+
+def test_convert_many_limit_is_shared_across_batches(monkeypatch):
+    lock = threading.Lock()
+    active = peak = 0
+
+    def slow_convert(tac_text):
+        nonlocal active, peak
+        with lock:
+            active += 1
+            peak = max(peak, active)
+        time.sleep(0.02)
+        with lock:
+            active -= 1
+        return tac_text, len(tac_text)
+
+    monkeypatch.setattr(conversion, "CONVERT_CONCURRENCY", 2)
+
+    async def main():
+        # Three concurrent "requests" of three distinct TACs each.
+        return await asyncio.gather(*(
+            conversion.convert_many([f"{r}-{i}" for i in range(3)], slow_convert)
+            for r in range(3)
+        ))
+
+    outcomes = asyncio.run(main())
+    assert [o[0] for o in outcomes[1]] == ["1-0", "1-1", "1-2"]
+    assert peak <= 2
+
+
+def _pretend_gifts_available(monkeypatch):
+    # Only the module-level import check is faked; the guards under test
+    # raise before the decoder is ever built.
+    monkeypatch.setattr(conversion, "metarDecoder", object())
+    monkeypatch.setattr(conversion, "metarEncoder", object())
+
+
+def test_non_metar_input_rejected(monkeypatch):
+    _pretend_gifts_available(monkeypatch)
+    for tac in ("TAF KJFK 231730Z 2318/2424 18012KT P6SM FEW040", "METARKJFK",
+                "metar KJFK 231751Z 18012KT", ""):
+        with pytest.raises(ConversionError, match="Not a METAR/SPECI message"):
+            conversion.convert_metar_tac_bytes(tac)
+    # A recognised report type gets past the guard (and on to the fake GIFTs),
+    # including one that follows a WMO bulletin heading.
+    for tac in ("  SPECI KJFK 231751Z 18012KT",
+                "SAUS70 KWBC 231800\nMETAR KJFK 231751Z 18012KT 10SM FEW040 15/07 A3005="):
+        with pytest.raises(ConversionError, match="decoder/encoder"):
+            conversion.convert_metar_tac_bytes(tac)
+
+
+def test_over_length_tac_rejected(monkeypatch):
+    _pretend_gifts_available(monkeypatch)
+    monkeypatch.setattr(conversion, "MAX_TAC_CHARS", 64)
+    too_long = "METAR KJFK 231751Z " + "RMK " * 20
+    with pytest.raises(ConversionError, match=rf"Message too long \({len(too_long)} characters; limit 64\)"):
+        conversion.convert_metar_tac_bytes(too_long)
+    # At the limit the length guard lets it through to the prefix check and GIFTs.
+    with pytest.raises(ConversionError, match="decoder/encoder"):
+        conversion.convert_metar_tac_bytes(too_long[:64])
+
+
+def _counting_probe(monkeypatch, fail=lambda: False, delay=0.0):
+    """Install a memoized stand-in converter and return its underlying call log.
+
+    gifts_available must call through ``__wrapped__``: going via the memo
+    would log at most one call however often it re-probes.
+    """
+    calls = []
+
+    @functools.lru_cache(maxsize=None)
+    def fake(tac_text):
+        calls.append(tac_text)
+        time.sleep(delay)
+        if fail():
+            raise ConversionError("probe failed")
+        return b"<ok/>"
+
+    monkeypatch.setattr(conversion, "convert_metar_tac_bytes", fake)
+    monkeypatch.setattr(conversion, "_health_state", None)
+    return calls
+
+
+def test_gifts_available_probes_once_per_ttl(monkeypatch):
+    now = [1000.0]
+    failing = [False]
+    monkeypatch.setattr(conversion, "time", types.SimpleNamespace(monotonic=lambda: now[0]))
+    monkeypatch.setattr(conversion, "HEALTH_CHECK_TTL", 10.0)
+    calls = _counting_probe(monkeypatch, fail=lambda: failing[0])
+
+    assert all(conversion.gifts_available() for _ in range(3))
+    now[0] += 9.9
+    assert conversion.gifts_available()
+    assert len(calls) == 1
+    now[0] += 0.2  # window expired: re-probe, through the memo
+    failing[0] = True
+    assert not conversion.gifts_available()
+    assert not conversion.gifts_available()
+    assert calls == [conversion.HEALTH_PROBE_TAC] * 2
+
+
+def test_gifts_available_concurrent_callers_share_one_probe(monkeypatch):
+    calls = _counting_probe(monkeypatch, delay=0.05)
+    start = threading.Barrier(8)
+    results = []
+
+    def check():
+        start.wait()
+        results.append(conversion.gifts_available())
+
+    threads = [threading.Thread(target=check) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert results == [True] * 8
+    assert len(calls) == 1
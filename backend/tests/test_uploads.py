@@ -0,0 +1,74 @@
+from backend.uploads import convert_uploads, output_name, read_upload_text
+from backend.conversion import ConversionError
+import backend.uploads as uploads
+import asyncio
+import io
+import sys
+import pathlib
+
+import pytest
+from fastapi import UploadFile
+
+# Ensure src layout path precedence for imports
+ROOT = pathlib.Path(__file__).resolve().parents[2]
+BACKEND_SRC = ROOT / "backend" / "src"
+if str(BACKEND_SRC) not in sys.path:
+    sys.path.insert(0, str(BACKEND_SRC))
+
+
+def test_output_name_strips_client_paths():
+    assert output_name("..\\..\\x.txt", ".xml") == "x.xml"
+    assert output_name("C:\\dir\\a.txt", ".xml") == "a.xml"
+    assert output_name("../../etc/passwd.tac", ".xml") == "passwd.xml"
+    assert output_name("dir/", ".xml") == "dir.xml"
+
+
+def test_output_name_edge_cases():
+    assert output_name("", ".xml") == "unknown.xml"
+    assert output_name(None, ".xml") == "unknown.xml"
+    assert output_name("KJFK", ".xml") == "KJFK.xml"
+    assert output_name("report.tac.txt", ".xml") == "report.tac.xml"
+    assert output_name(".hidden", ".xml") == ".hidden.xml"
+
+
+class _Unreadable(io.BytesIO):
+    def read(self, *args):  # pragma: no cover - must never be reached
+        raise AssertionError("upload body read despite known size")
+
+
+def test_read_upload_text_rejects_known_size_unread(monkeypatch):
+    monkeypatch.setattr(uploads, "MAX_UPLOAD_BYTES", 16)
+    uf = UploadFile(_Unreadable(), filename="big.tac", size=17)
+    with pytest.raises(ConversionError, match="exceeds 16 bytes"):
+        asyncio.run(read_upload_text(uf))
+    assert asyncio.run(read_upload_text(UploadFile(_Unreadable(), size=0))) == ""
+
+
+def test_read_upload_text_rejects_streamed_overflow(monkeypatch):
+    monkeypatch.setattr(uploads, "MAX_UPLOAD_BYTES", 16)
+    monkeypatch.setattr(uploads, "_UPLOAD_CHUNK_BYTES", 4)
+    # size=None: the limit can only be enforced while reading.
+    uf = UploadFile(io.BytesIO(b"METAR " + b"X" * 32), filename="big.tac")
+    with pytest.raises(ConversionError, match="exceeds 16 bytes"):
+        asyncio.run(read_upload_text(uf))
+    ok = UploadFile(io.BytesIO(b"  METAR KJFK \n"), filename="ok.tac")
+    assert asyncio.run(read_upload_text(ok)) == "METAR KJFK"
+
+
+def test_convert_uploads_pairs_outcomes_with_sources():
+    def fake_convert(tac_text):
+        if tac_text.startswith("BAD"):
+            raise ConversionError("bad report")
+        return tac_text.lower().encode()
+
+    files = [
+        UploadFile(io.BytesIO(b"METAR A"), filename="dir/a.tac"),
+        UploadFile(io.BytesIO(b"  "), filename="blank.tac"),
+        UploadFile(io.BytesIO(b"BAD"), filename="b.tac"),
+    ]
+    results, errors = asyncio.run(convert_uploads(files, " METAR M ", ".xml", fake_convert))
+    assert results == [("manual_input.xml", "manual", b"metar m"),
+                       ("a.xml", "dir/a.tac", b"metar a")]
+    assert errors == ["blank.tac: empty file", "b.tac: bad report"]
+    results, errors = asyncio.run(convert_uploads([], "BAD", ".xml", fake_convert))
+    assert (results, errors) == ([], ["manual_input: bad report"])
@@ -0,0 +1,83 @@
+"""Repository-wide pytest fixtures shared by tests/ and gui/tests/."""
+from __future__ import annotations
+
+import os
+import secrets
+
+import orjson
+import pytest
+
+# Cheapest valid Argon2 parameters for test runs; auth.security reads these
+# at import, which happens after conftest loads. Deployments are unaffected.
+os.environ.setdefault("AUTH_ARGON2_TIME_COST", "1")
+os.environ.setdefault("AUTH_ARGON2_MEMORY_COST", "8")
+
+# Auth data goes to a shared-cache in-memory SQLite database private to this
+# process: no disk I/O per registration, and each pytest-xdist worker
+# (``pytest -n auto --dist=loadfile``) is isolated for free. REUSE_AUTH=1
+# needs the user to outlive the run, so it keeps a file, one per worker.
+if os.getenv("REUSE_AUTH") == "1":
+    _xdist_worker = os.environ.get("PYTEST_XDIST_WORKER")
+    if _xdist_worker:
+        os.environ.setdefault("AUTH_DB_URL", f"sqlite:///./auth_{_xdist_worker}.db")
+else:
+    os.environ.setdefault("AUTH_DB_URL", "sqlite:///file::memory:?cache=shared&uri=true")
+
+
+def pytest_configure(config: pytest.Config) -> None:
+    config.addinivalue_line(
+        "markers", "slow: heavier variants; deselect with -m 'not slow'")
+
+
+_AUTH_CACHE_KEY = "iwxxm/shared_auth"
+_JSON_HEADERS = {"Content-Type": "application/json"}
+
+
+@pytest.fixture(scope="session")
+def shared_auth(request: pytest.FixtureRequest) -> dict[str, str]:
+    """Register one user for the whole run and return its credentials and token.
+
+    Registration goes through the router the GUI mounts (the real auth router,
+    or its mock fallback), so the token is accepted by every app under test
+    that shares this process.
+
+    With ``REUSE_AUTH=1`` the credentials are kept in the pytest cache and
+    reused on later runs for as long as ``/auth/me`` still accepts the token;
+    CI leaves it unset so the register/login flow is exercised every run.
+    """
+    from fastapi import FastAPI
+    from fastapi.testclient import TestClient
+    from gui.app import auth_router  # type: ignore
+
+    suffix = secrets.token_hex(4)
+    reg_payload = {
+        "name": "Test User",
+        "email": f"tester-{suffix}@example.com",
+        "address": "123 Test St",
+        "username": f"tester{suffix}",
+        "password": "StrongPass123!",
+    }
+    app = FastAPI()
+    app.include_router(auth_router)
+    cache = (getattr(request.config, "cache", None)
+             if os.getenv("REUSE_AUTH") == "1" else None)
+    with TestClient(app) as c:
+        cached = cache.get(_AUTH_CACHE_KEY, None) if cache is not None else None
+        if cached and c.get("/auth/me", headers={
+                "Authorization": f"Bearer {cached['token']}"}).status_code == 200:
+            return cached
+        r = c.post("/auth/register", content=orjson.dumps(reg_payload),
+                   headers=_JSON_HEADERS)
+        assert r.status_code == 200, r.text
+        r_login = c.post("/auth/login", content=orjson.dumps({
+            "username": reg_payload["username"], "password": reg_payload["password"]
+        }), headers=_JSON_HEADERS)
+        assert r_login.status_code == 200, r_login.text
+    creds = {
+        "username": reg_payload["username"],
+        "password": reg_payload["password"],
+        "token": r_login.json()["access_token"],
+    }
+    if cache is not None:
+        cache.set(_AUTH_CACHE_KEY, creds)
+    return creds
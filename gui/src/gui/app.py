@@ -9,12 +9,14 @@ import pathlib
 import sys
 import os
 import json
-import io
-import zipfile
+import contextlib
 import datetime
+import functools
+import hashlib
+import orjson
 from typing import List, Optional
-from fastapi import FastAPI, UploadFile, File, Form, HTTPException, Depends, Header
-from fastapi.responses import HTMLResponse, StreamingResponse
+from fastapi import FastAPI, UploadFile, File, Form, HTTPException, Depends, Header, Request
+from fastapi.responses import HTMLResponse, Response, StreamingResponse
 from fastapi.staticfiles import StaticFiles
 from pydantic import BaseModel, Field, ConfigDict
 
@@ -39,8 +41,9 @@ for _root in _CANDIDATE_REPO_ROOTS:
 else:  # Fallback to deepest ancestor
     REPO_ROOT = _FILE_PATH.parents[-1]
 
+# Appended: an installed backend package should win over the checkout.
 if str(REPO_ROOT) not in sys.path:
-    sys.path.insert(0, str(REPO_ROOT))
+    sys.path.append(str(REPO_ROOT))
 
 # Resolve static directory from multiple candidates.
 _STATIC_CANDIDATES = []
@@ -67,15 +70,16 @@ else:
                        ', '.join(str(c) for c in _STATIC_CANDIDATES))
 
 try:
-    from backend.conversion import convert_metar_tac, ConversionError  # type: ignore
+    from backend.conversion import convert_metar_tac_bytes, gifts_available, start_process_pool, shutdown_process_pool  # type: ignore
+    from backend.archive import Compression, stream_zip  # type: ignore
+    from backend.uploads import convert_uploads  # type: ignore
 except Exception as e:  # pragma: no cover
     raise RuntimeError(f"Failed to import conversion module: {e}") from e
 
 # Auth (real or mock fallback)
 try:
-    from auth.api import router as auth_router  # type: ignore
+    from auth.api import router as auth_router, get_current_user as _auth_current_user  # type: ignore
     from auth.security import decode_access_token  # type: ignore
-    from auth.database import SessionLocal  # type: ignore
     from auth.models import User  # type: ignore
     _mock_mode = False
 except Exception:  # pragma: no cover - fallback for isolated GUI tests
@@ -107,16 +111,16 @@ except Exception:  # pragma: no cover - fallback for isolated GUI tests
 
     def decode_access_token(
         token: str) -> str | None: return token[5:] if token.startswith("mock-") else None
-    SessionLocal = None  # type: ignore
 
     class User:  # type: ignore
         def __init__(self, username: str): self.username = username
 
+
 # Models
 
 
 class ConversionResult(BaseModel):
-    model_config = ConfigDict(json_schema_extra={"example": {
+    model_config = ConfigDict(frozen=True, json_schema_extra={"example": {
                               "name": "KJFK_231751Z.txt", "content": "<?xml version='1.0' encoding='utf-8'?><iwxxm:METAR ...>", "source": "file", "size_bytes": 1452}})
     name: str = Field(..., description="Output filename")
     content: str = Field(..., description="IWXXM XML document", min_length=1)
@@ -126,7 +130,7 @@ class ConversionResult(BaseModel):
 
 
 class ConversionResponse(BaseModel):
-    model_config = ConfigDict(json_schema_extra={"example": {"results": [
+    model_config = ConfigDict(frozen=True, json_schema_extra={"example": {"results": [
                               {"name": "manual_input.txt", "content": "...", "source": "manual", "size_bytes": 1452}], "errors": [], "total_processed": 1, "successful": 1, "failed": 0}})
     results: List[ConversionResult] = Field(default_factory=list)
     errors: List[str] = Field(default_factory=list)
@@ -136,18 +140,43 @@ class ConversionResponse(BaseModel):
 
 
 class ErrorDetail(BaseModel):
+    """Shape of the 400 ``detail`` payload; endpoints build it as a plain dict."""
+    model_config = ConfigDict(frozen=True)
     message: str
     errors: List[str] = Field(default_factory=list)
     total_errors: int = Field(..., ge=0)
 
 
 class HealthResponse(BaseModel):
+    model_config = ConfigDict(frozen=True)
     status: str
     version: str
     gifts_available: bool
 
 
-app = FastAPI(title="METAR to IWXXM Converter", version="0.1.0")
+# Output models are frozen, so the two possible health payloads are built once.
+_HEALTHY = HealthResponse(status="healthy", version="0.1.0", gifts_available=True)
+_DEGRADED = HealthResponse(status="degraded", version="0.1.0", gifts_available=False)
+
+
+@contextlib.asynccontextmanager
+async def lifespan(app: FastAPI):
+    # None when CONVERT_WORKERS=0 (conversions stay on the thread pool).
+    pool = app.state.pool = start_process_pool()
+    try:
+        yield
+    finally:
+        if app.state.pool is pool:
+            app.state.pool = None
+        shutdown_process_pool(pool)
+
+
+def _app_pool(request: Request):
+    # Absent when the lifespan never ran (e.g. mounted under another app).
+    return getattr(request.app.state, "pool", None)
+
+
+app = FastAPI(title="METAR to IWXXM Converter", version="0.1.0", lifespan=lifespan)
 app.mount("/static", StaticFiles(directory=str(static_dir)), name="static")
 if auth_router is not None:
     app.include_router(auth_router)
@@ -155,41 +184,26 @@ if auth_router is not None:
 # Auth helpers
 
 
-def get_db():
-    if _mock_mode:
-        yield None
-        return
-    if SessionLocal is None:
-        raise HTTPException(status_code=500, detail="Auth DB not initialized")
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
-
-
-def current_user(authorization: str | None = Header(default=None), db=Depends(get_db)):
-    if decode_access_token is None:
-        raise HTTPException(
-            status_code=503, detail="Authentication not available")
-    if not authorization or not authorization.lower().startswith("bearer "):
-        raise HTTPException(status_code=401, detail="Not authenticated")
-    token = authorization.split()[1]
-    username = decode_access_token(token)
-    if not username:
-        raise HTTPException(status_code=401, detail="Invalid token")
-    if _mock_mode:
+if _mock_mode:
+    def current_user(authorization: str | None = Header(default=None)):
+        # Same parsing as auth.api: only the 7-character scheme is case-folded.
+        scheme = authorization[:7] if authorization else ""
+        if scheme != "Bearer " and scheme.lower() != "bearer ":
+            raise HTTPException(status_code=401, detail="Not authenticated")
+        token = authorization[7:].strip()
+        username = decode_access_token(token)
+        if not username:
+            raise HTTPException(status_code=401, detail="Invalid token")
         return User(username)  # type: ignore
-    user = db.query(User).filter(User.username ==
-                                 username).first()  # type: ignore
-    if not user:
-        raise HTTPException(status_code=401, detail="User not found")
-    return user
+else:
+    # The auth router's dependency: async session plus its username -> id
+    # cache, so protected requests don't block the loop on a sync query.
+    current_user = _auth_current_user
 
 
-@app.get("/", response_class=HTMLResponse)
-def index() -> HTMLResponse:
-    """Serve the main page (auth handled client-side)."""
+@functools.lru_cache(maxsize=1)
+def _index_page() -> tuple[bytes, str]:
+    """Build the injected index page and its ETag once; the file and BACKEND_URL are fixed per process."""
     index_path = static_dir / "index.html"
     if not index_path.exists():
         raise HTTPException(status_code=500, detail="index.html missing")
@@ -198,88 +212,62 @@ def index() -> HTMLResponse:
     injection = f"<script>window.METAR_API_BASE={json.dumps(backend_url)};</script>"
     html = raw_html.replace(
         "</body>", injection + "</body>") if "</body>" in raw_html else raw_html + injection
-    return HTMLResponse(html)
+    body = html.encode("utf-8")
+    return body, '"' + hashlib.blake2b(body, digest_size=8).hexdigest() + '"'
+
+
+def _etag_matches(if_none_match: str | None, etag: str) -> bool:
+    """If-None-Match check: ``*`` or any listed tag, compared weakly (RFC 9110)."""
+    if not if_none_match:
+        return False
+    for tag in if_none_match.split(","):
+        tag = tag.strip()
+        if tag == "*" or tag.removeprefix("W/") == etag:
+            return True
+    return False
+
+
+@app.get("/", response_class=HTMLResponse)
+def index(if_none_match: str | None = Header(default=None)) -> HTMLResponse:
+    """Serve the main page (auth handled client-side)."""
+    body, etag = _index_page()
+    if _etag_matches(if_none_match, etag):
+        return HTMLResponse(status_code=304, headers={"ETag": etag})
+    return HTMLResponse(body, headers={"ETag": etag})
 
 
 @app.get("/health", response_model=HealthResponse)
 def health() -> HealthResponse:
-    try:
-        from backend.conversion import convert_metar_tac  # type: ignore
-        _ = convert_metar_tac(
-            "METAR KJFK 231751Z 18012KT 10SM FEW040 15/07 A3005")
-        return HealthResponse(status="healthy", version="0.1.0", gifts_available=True)
-    except Exception:
-        return HealthResponse(status="degraded", version="0.1.0", gifts_available=False)
-
-
-@app.post("/api/convert", response_model=ConversionResponse)
-async def convert(files: List[UploadFile] = File(default=[]), manual_text: str = Form(default=""), user=Depends(current_user)) -> ConversionResponse:
-    results: List[ConversionResult] = []
-    errors: List[str] = []
-    total_inputs = 0
-    if manual_text.strip():
-        total_inputs += 1
-        try:
-            xml_text = convert_metar_tac(manual_text.strip())
-            results.append(ConversionResult(name="manual_input.txt", content=xml_text,
-                           source="manual", size_bytes=len(xml_text.encode())))
-        except ConversionError as e:
-            errors.append(f"manual_input: {e}")
-    for uf in files:
-        total_inputs += 1
-        try:
-            data = (await uf.read()).decode("utf-8", errors="ignore")
-            if not data.strip():
-                errors.append(f"{uf.filename}: empty file")
-                continue
-            xml_text = convert_metar_tac(data)
-            out_name = pathlib.Path(uf.filename or "unknown").stem + ".txt"
-            results.append(ConversionResult(name=out_name, content=xml_text,
-                           source=uf.filename, size_bytes=len(xml_text.encode())))
-        except ConversionError as e:
-            errors.append(f"{uf.filename}: {e}")
-        except Exception as e:
-            errors.append(f"{uf.filename}: unexpected error {e}")
+    return _HEALTHY if gifts_available() else _DEGRADED
+
+
+@app.post("/api/convert", response_model=None, responses={200: {"model": ConversionResponse}})
+async def convert(request: Request, files: List[UploadFile] = File(default=[]), manual_text: str = Form(default=""), user=Depends(current_user)) -> Response:
+    # Results are built from values we produced ourselves, so they go out as
+    # plain dicts shaped like ConversionResponse, with no model in between.
+    total_inputs = (1 if manual_text.strip() else 0) + len(files)
+    converted, errors = await convert_uploads(files, manual_text, ".txt", pool=_app_pool(request))
+    results = [{"name": name, "content": xml_text, "source": source, "size_bytes": size_bytes}
+               for name, source, (xml_text, size_bytes) in converted]
     if not results and errors:
-        raise HTTPException(status_code=400, detail=ErrorDetail(
-            message="All conversions failed", errors=errors, total_errors=len(errors)).model_dump())
-    return ConversionResponse(results=results, errors=errors, total_processed=total_inputs, successful=len(results), failed=len(errors))
+        raise HTTPException(status_code=400, detail={
+            "message": "All conversions failed", "errors": errors, "total_errors": len(errors)})
+    return Response(orjson.dumps({"results": results, "errors": errors, "total_processed": total_inputs, "successful": len(results), "failed": len(errors)}), media_type="application/json")
 
 
 @app.post("/api/convert-zip", response_class=StreamingResponse)
-async def convert_zip(files: List[UploadFile] = File(default=[]), manual_text: str = Form(default=""), user=Depends(current_user)) -> StreamingResponse:
-    results: List[tuple[str, str]] = []
-    errors: List[str] = []
-    if manual_text.strip():
-        try:
-            xml_text = convert_metar_tac(manual_text.strip())
-            results.append(("manual_input.xml", xml_text))
-        except ConversionError as e:
-            errors.append(f"manual_input: {e}")
-    for uf in files:
-        try:
-            data = (await uf.read()).decode("utf-8", errors="ignore").strip()
-            if not data:
-                errors.append(f"{uf.filename}: empty file")
-                continue
-            xml_text = convert_metar_tac(data)
-            fname = pathlib.Path(uf.filename or "unknown").stem + ".xml"
-            results.append((fname, xml_text))
-        except ConversionError as e:
-            errors.append(f"{uf.filename}: {e}")
-        except Exception as e:
-            errors.append(f"{uf.filename}: unexpected error {e}")
+async def convert_zip(request: Request, files: List[UploadFile] = File(default=[]), manual_text: str = Form(default=""),
+                      compression: Compression = Form(default="auto"),
+                      user=Depends(current_user)) -> StreamingResponse:
+    converted, errors = await convert_uploads(
+        files, manual_text, ".xml", convert_metar_tac_bytes, _app_pool(request))
+    results = [(name, xml_bytes) for name, _, xml_bytes in converted]
     if not results and errors:
-        raise HTTPException(status_code=400, detail=ErrorDetail(
-            message="No valid conversions to include in ZIP", errors=errors, total_errors=len(errors)).model_dump())
-    mem = io.BytesIO()
-    with zipfile.ZipFile(mem, "w", zipfile.ZIP_DEFLATED) as zf:
-        for fname, content in results:
-            zf.writestr(fname, content)
-        if errors:
-            zf.writestr("errors.txt", "\n".join(errors))
-    mem.seek(0)
-    stamp = datetime.datetime.now(datetime.UTC).strftime("%Y%m%dT%H%M%SZ")
-    return StreamingResponse(mem, media_type="application/zip", headers={"Content-Disposition": f"attachment; filename=iwxxm_batch_{stamp}.zip"})
+        raise HTTPException(status_code=400, detail={
+            "message": "No valid conversions to include in ZIP", "errors": errors, "total_errors": len(errors)})
+    entries = results + ([("errors.txt", "\n".join(errors))] if errors else [])
+    t = datetime.datetime.now(datetime.UTC)
+    stamp = f"{t.year:04d}{t.month:02d}{t.day:02d}T{t.hour:02d}{t.minute:02d}{t.second:02d}Z"
+    return StreamingResponse(stream_zip(entries, compression), media_type="application/zip", headers={"Content-Disposition": f"attachment; filename=iwxxm_batch_{stamp}.zip"})
 
 __all__ = ["app"]
@@ -1,6 +1,10 @@
+import os
 import sys
 from pathlib import Path
 
+import httpx
+import pytest
+
 # Ensure repository root is on sys.path so `import gui` works when pytest
 # is invoked from inside subdirectories or other project areas.
 # This avoids ModuleNotFoundError for the gui package when running tests
@@ -8,3 +12,61 @@ from pathlib import Path
 repo_root = Path(__file__).resolve().parents[2]
 if str(repo_root) not in sys.path:
     sys.path.insert(0, str(repo_root))
+
+
+def _stub_bytes(tac_text: str) -> bytes:
+    from backend.conversion import ConversionError
+    if not tac_text.startswith(("METAR", "SPECI")):
+        raise ConversionError("Input must start with METAR or SPECI")
+    return (f"<?xml version='1.0'?><iwxxm:METAR>{tac_text[:20]}</iwxxm:METAR>"
+            .encode("utf-8"))
+
+
+def _stub_sized(tac_text: str) -> tuple[str, int]:
+    xml = _stub_bytes(tac_text)
+    return xml.decode("utf-8"), len(xml)
+
+
+@pytest.fixture(scope="session", autouse=True)
+def _fast_conversion_stub():
+    """With GUI_FAST_STUB=1, swap GIFTs for a constant stub in the GUI tests.
+
+    The GUI tests only check response shape, so this skips real decoding and
+    XML building; backend/tests still exercise the real converter. Spawned
+    pool workers would not see the patch, so the GUI endpoints are pointed
+    at no pool (even one an earlier lifespan of the same app left in
+    ``app.state``) and lifespans started meanwhile create none.
+    """
+    if os.getenv("GUI_FAST_STUB") != "1":
+        yield
+        return
+    import backend.conversion as conversion
+    import gui.app  # noqa: F401  (the package re-exports ``app``)
+    gui_module = sys.modules["gui.app"]
+
+    with pytest.MonkeyPatch.context() as mp:
+        mp.setattr(conversion, "CONVERT_WORKERS", 0)
+        mp.setattr(gui_module, "_app_pool", lambda request: None)
+        mp.setattr(conversion, "convert_metar_tac_bytes", _stub_bytes)
+        mp.setattr(conversion, "convert_metar_tac_sized", _stub_sized)
+        mp.setattr(gui_module, "convert_metar_tac_bytes", _stub_bytes)
+        yield
+
+
+@pytest.fixture(scope="session")
+def anyio_backend() -> str:
+    return "asyncio"
+
+
+@pytest.fixture(scope="session")
+async def aclient(anyio_backend):
+    """Session AsyncClient that calls the GUI app in-process over ASGITransport.
+
+    Unlike TestClient there is no portal thread per request; ASGITransport
+    does not run the lifespan, so it is entered here around the client.
+    """
+    from gui.app import app
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://testserver") as c:
+            yield c
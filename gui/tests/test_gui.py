@@ -3,55 +3,68 @@
 Ensures static assets load and conversion endpoints function under auth.
 """
 from __future__ import annotations
-from gui.app import app
 
-import random
-import string
+import asyncio
 import sys
 import pathlib
-from typing import Generator
+import tempfile
+import zipfile
 
+import httpx
 import pytest
-from fastapi.testclient import TestClient
 
 # Ensure repository root on path
 ROOT = pathlib.Path(__file__).resolve().parents[2]
 if str(ROOT) not in sys.path:
     sys.path.insert(0, str(ROOT))
 
-
-@pytest.fixture(scope="session")
-def client() -> TestClient:
-    return TestClient(app)
+pytestmark = pytest.mark.anyio
 
 
 @pytest.fixture(scope="session")
-def auth_token(client: TestClient) -> str:
-    suffix = ''.join(random.choices(
-        string.ascii_lowercase + string.digits, k=8))
-    reg_payload = {
-        "name": "GUI Test User",
-        "email": f"guitest-{suffix}@example.com",
-        "address": "123 Test St",
-        "username": f"guitester{suffix}",
-        "password": "StrongPass123!",
-    }
-    r = client.post("/auth/register", json=reg_payload)
-    assert r.status_code == 200, r.text
-    r_login = client.post("/auth/login", json={
-        "username": reg_payload["username"], "password": reg_payload["password"]
-    })
-    assert r_login.status_code == 200, r_login.text
-    return r_login.json()["access_token"]
+def auth_token(shared_auth: dict[str, str]) -> str:
+    return shared_auth["token"]
 
 
 def _auth_headers(token: str) -> dict[str, str]:
     return {"Authorization": f"Bearer {token}"}
 
 
+@pytest.fixture(scope="session")
+def auth_headers(auth_token: str) -> dict[str, str]:
+    return _auth_headers(auth_token)
+
+
+# Sample payloads built once at import instead of re-encoded in every test.
+SAMPLE_METAR_KJFK_TEXT = "METAR KJFK 231751Z 18012KT 10SM FEW040 15/07 A3005"
+SAMPLE_METAR_KJFK = SAMPLE_METAR_KJFK_TEXT.encode("utf-8")
+SAMPLE_METAR_EGLL = b"METAR EGLL 231750Z 27015KT 9999 FEW040 17/09 Q1023"
+SAMPLE_METAR_TUPLE = ("files", ("test.tac", SAMPLE_METAR_KJFK, "text/plain"))
+
+
+async def _post_zip(aclient: httpx.AsyncClient, **kwargs):
+    """POST to /api/convert-zip, spooling the body to a temp file in 64 KiB chunks.
+
+    Returns ``(response, file)``; the caller opens the file with ``ZipFile``,
+    which seeks to the central directory instead of holding the whole archive.
+    """
+    tmp = tempfile.TemporaryFile()
+    async with aclient.stream("POST", "/api/convert-zip", **kwargs) as response:
+        async for chunk in response.aiter_bytes(64 * 1024):
+            tmp.write(chunk)
+    tmp.seek(0)
+    return response, tmp
+
+
+def _multi_metar_tac(count: int) -> bytes:
+    return "\n".join(
+        f"METAR KJFK 2317{i:02d}Z 18012KT 10SM FEW040 15/07 A3005" for i in range(count)
+    ).encode("utf-8")
+
+
 class TestHealth:
-    def test_health_endpoint(self, client: TestClient) -> None:
-        response = client.get("/health")
+    async def test_health_endpoint(self, aclient: httpx.AsyncClient) -> None:
+        response = await aclient.get("/health")
         assert response.status_code == 200
         data = response.json()
         assert data["status"] in ["healthy", "degraded"]
@@ -59,127 +72,172 @@ class TestHealth:
 
 
 class TestStaticFiles:
-    def test_index_page_loads(self, client: TestClient, auth_token: str) -> None:
-        response = client.get("/", headers=_auth_headers(auth_token))
+    @pytest.mark.parametrize("path,content_type,needle", [
+        ("/", "text/html", "METAR"),
+        ("/static/app.js", "javascript", ""),
+        ("/static/style.css", "text/css", ""),
+    ])
+    async def test_page_loads(self, aclient: httpx.AsyncClient, auth_headers: dict[str, str],
+                              path: str, content_type: str, needle: str) -> None:
+        response = await aclient.get(path, headers=auth_headers)
         assert response.status_code == 200
-        assert "text/html" in response.headers["content-type"]
-        assert "METAR" in response.text
-
-    def test_javascript_loads(self, client: TestClient) -> None:
-        response = client.get("/static/app.js")
-        assert response.status_code == 200
-        assert "application/javascript" in response.headers["content-type"] or "text/javascript" in response.headers["content-type"]
-
-    def test_css_loads(self, client: TestClient) -> None:
-        response = client.get("/static/style.css")
+        assert content_type in response.headers["content-type"]
+        assert needle in response.text
+
+
+    async def test_index_conditional_get(self, aclient: httpx.AsyncClient) -> None:
+        etag = (await aclient.get("/")).headers["etag"]
+        for if_none_match in (etag, "*", f'"other", W/{etag}'):
+            response = await aclient.get("/", headers={"If-None-Match": if_none_match})
+            assert response.status_code == 304
+            assert response.content == b""
+            assert response.headers["etag"] == etag
+        response = await aclient.get("/", headers={"If-None-Match": '"other"'})
         assert response.status_code == 200
-        assert "text/css" in response.headers["content-type"]
+        assert "METAR" in response.text
 
 
 class TestConvertEndpoint:
-    def test_manual_text_conversion(self, client: TestClient, auth_token: str) -> None:
+    async def test_manual_text_conversion(self, aclient: httpx.AsyncClient, auth_headers: dict[str, str]) -> None:
         metar = "METAR KJFK 231751Z 18012KT 10SM FEW040 SCT120 BKN250 15/07 A3005"
-        response = client.post(
-            "/api/convert", data={"manual_text": metar}, headers=_auth_headers(auth_token))
+        response = await aclient.post(
+            "/api/convert", data={"manual_text": metar}, headers=auth_headers)
         assert response.status_code == 200
         data = response.json()
         assert data["successful"] == 1
 
-    def test_file_upload_conversion(self, client: TestClient, auth_token: str) -> None:
-        metar = "METAR EGLL 231750Z 27015KT 9999 FEW040 17/09 Q1023".encode(
-            "utf-8")
-        response = client.post(
-            "/api/convert",
-            files={"files": ("test.tac", metar, "text/plain")},
-            headers=_auth_headers(auth_token),
-        )
-        assert response.status_code == 200
-        data = response.json()
-        assert len(data["results"]) == 1
-
-    def test_multiple_file_upload(self, client: TestClient, auth_token: str) -> None:
-        files = [
-            ("files", ("metar1.tac",
-             b"METAR KJFK 231751Z 18012KT 10SM FEW040 15/07 A3005", "text/plain")),
-            ("files", ("metar2.tac",
-             b"METAR EGLL 231750Z 27015KT 9999 FEW040 17/09 Q1023", "text/plain")),
-        ]
-        response = client.post("/api/convert", files=files,
-                               headers=_auth_headers(auth_token))
+    @pytest.mark.parametrize("files,expected", [
+        ([("files", ("test.tac", SAMPLE_METAR_EGLL, "text/plain"))], 1),
+        ([("files", ("metar1.tac", SAMPLE_METAR_KJFK, "text/plain")),
+          ("files", ("metar2.tac", SAMPLE_METAR_EGLL, "text/plain"))], 2),
+    ], ids=["single", "multiple"])
+    async def test_file_upload_conversion(self, aclient: httpx.AsyncClient, auth_headers: dict[str, str],
+                                          files: list, expected: int) -> None:
+        response = await aclient.post("/api/convert", files=files, headers=auth_headers)
         assert response.status_code == 200
         data = response.json()
-        assert len(data["results"]) == 2
-
-    def test_manual_and_files_combined(self, client: TestClient, auth_token: str) -> None:
-        response = client.post(
+        assert len(data["results"]) == expected
+
+    async def test_concurrent_conversions(self, aclient: httpx.AsyncClient, auth_headers: dict[str, str]) -> None:
+        # Three conversions in flight at once on the shared event loop.
+        responses = await asyncio.gather(*(
+            aclient.post("/api/convert", files=[SAMPLE_METAR_TUPLE], headers=auth_headers)
+            for _ in range(3)
+        ))
+        for response in responses:
+            assert response.status_code == 200
+            assert response.json()["successful"] == 1
+
+    async def test_manual_and_files_combined(self, aclient: httpx.AsyncClient, auth_headers: dict[str, str]) -> None:
+        response = await aclient.post(
             "/api/convert",
             data={"manual_text": "METAR LFPG 231800Z 09012KT CAVOK 18/08 Q1015"},
-            files={"files": (
-                "test.tac", b"METAR KJFK 231751Z 18012KT 10SM FEW040 15/07 A3005", "text/plain")},
-            headers=_auth_headers(auth_token),
+            files=[SAMPLE_METAR_TUPLE],
+            headers=auth_headers,
         )
         assert response.status_code == 200
         data = response.json()
         assert len(data["results"]) == 2
 
-    def test_empty_file_error(self, client: TestClient, auth_token: str) -> None:
-        response = client.post(
+    async def test_empty_file_error(self, aclient: httpx.AsyncClient, auth_headers: dict[str, str]) -> None:
+        response = await aclient.post(
             "/api/convert",
             files={"files": ("empty.tac", b"", "text/plain")},
-            headers=_auth_headers(auth_token),
+            headers=auth_headers,
         )
         assert response.status_code == 400
 
-    def test_no_input_returns_empty(self, client: TestClient, auth_token: str) -> None:
-        response = client.post(
-            "/api/convert", data={"manual_text": ""}, headers=_auth_headers(auth_token))
+    async def test_no_input_returns_empty(self, aclient: httpx.AsyncClient, auth_headers: dict[str, str]) -> None:
+        response = await aclient.post(
+            "/api/convert", data={"manual_text": ""}, headers=auth_headers)
         assert response.status_code == 200
         data = response.json()
         assert len(data["results"]) == 0
 
 
 class TestConvertZipEndpoint:
-    def test_zip_with_manual_input(self, client: TestClient, auth_token: str) -> None:
-        response = client.post(
-            "/api/convert-zip",
-            data={"manual_text": "METAR KJFK 231751Z 18012KT 10SM FEW040 15/07 A3005"},
-            headers=_auth_headers(auth_token),
-        )
+    async def test_zip_with_manual_input(self, aclient: httpx.AsyncClient, auth_headers: dict[str, str]) -> None:
+        response, tmp = await _post_zip(
+            aclient, data={"manual_text": SAMPLE_METAR_KJFK_TEXT}, headers=auth_headers)
         assert response.status_code == 200
         assert response.headers["content-type"] == "application/zip"
+        with tmp, zipfile.ZipFile(tmp) as zf:
+            names = zf.namelist()
+        assert "manual_input.xml" in names
+        assert "errors.txt" not in names
+
+    @pytest.mark.parametrize("compression,expected", [
+        ("stored", zipfile.ZIP_STORED),
+        ("deflate", zipfile.ZIP_DEFLATED),
+        ("auto", zipfile.ZIP_STORED),
+    ])
+    async def test_zip_compression_field(self, aclient: httpx.AsyncClient, auth_headers: dict[str, str],
+                                         monkeypatch: pytest.MonkeyPatch,
+                                         compression: str, expected: int) -> None:
+        gui_module = sys.modules["gui.app"]
+        monkeypatch.setattr(gui_module, "convert_metar_tac_bytes",
+                            lambda tac: b"<iwxxm:METAR/>")
+        monkeypatch.setattr(gui_module, "_app_pool", lambda request: None)
+        response, tmp = await _post_zip(
+            aclient, data={"manual_text": SAMPLE_METAR_KJFK_TEXT, "compression": compression},
+            headers=auth_headers)
+        assert response.status_code == 200
+        with tmp, zipfile.ZipFile(tmp) as zf:
+            assert [i.compress_type for i in zf.infolist()] == [expected]
+
+    async def test_zip_compression_field_rejects_unknown(self, aclient: httpx.AsyncClient,
+                                                         auth_headers: dict[str, str]) -> None:
+        response = await aclient.post(
+            "/api/convert-zip",
+            data={"manual_text": SAMPLE_METAR_KJFK_TEXT, "compression": "zstd"},
+            headers=auth_headers,
+        )
+        assert response.status_code == 422
 
-    def test_zip_no_input_fails(self, client: TestClient, auth_token: str) -> None:
-        response = client.post(
+    async def test_zip_no_input_fails(self, aclient: httpx.AsyncClient, auth_headers: dict[str, str]) -> None:
+        response = await aclient.post(
             "/api/convert-zip",
             data={"manual_text": ""},
-            headers=_auth_headers(auth_token),
+            headers=auth_headers,
         )
         assert response.status_code in [200, 400]
 
 
 class TestErrorHandling:
-    def test_nonexistent_static_file_404(self, client: TestClient) -> None:
-        response = client.get("/static/nonexistent.js")
+    async def test_nonexistent_static_file_404(self, aclient: httpx.AsyncClient) -> None:
+        response = await aclient.get("/static/nonexistent.js")
         assert response.status_code == 404
 
-    def test_unicode_in_manual_input(self, client: TestClient, auth_token: str) -> None:
-        response = client.post(
+    async def test_unicode_in_manual_input(self, aclient: httpx.AsyncClient, auth_headers: dict[str, str]) -> None:
+        response = await aclient.post(
             "/api/convert",
             data={
-                "manual_text": "METAR KJFK 231751Z 18012KT 10SM FEW040 15/07 A3005 RMK AO2"},
-            headers=_auth_headers(auth_token),
+                "manual_text": SAMPLE_METAR_KJFK_TEXT + " RMK AO2"},
+            headers=auth_headers,
         )
         assert response.status_code in [200, 400]
 
-    def test_large_file_upload(self, client: TestClient, auth_token: str) -> None:
-        metars = "\n".join([
-            f"METAR KJFK 2317{i:02d}Z 18012KT 10SM FEW040 15/07 A3005" for i in range(3)
-        ])
-        response = client.post(
+    async def test_oversized_upload_rejected(self, aclient: httpx.AsyncClient, auth_headers: dict[str, str],
+                                             monkeypatch: pytest.MonkeyPatch) -> None:
+        import backend.uploads as uploads
+        monkeypatch.setattr(uploads, "MAX_UPLOAD_BYTES", 16)
+        response = await aclient.post(
+            "/api/convert",
+            files={"files": ("big.tac", SAMPLE_METAR_KJFK, "text/plain")},
+            headers=auth_headers,
+        )
+        assert response.status_code == 400
+        assert response.json()["detail"]["errors"] == ["big.tac: file exceeds 16 bytes"]
+
+    # Two METARs already show a multi-report upload is handled gracefully;
+    # the ten-report case is kept behind the ``slow`` marker.
+    @pytest.mark.parametrize("count", [2, pytest.param(10, marks=pytest.mark.slow)])
+    async def test_large_file_upload(self, aclient: httpx.AsyncClient, auth_headers: dict[str, str],
+                                     count: int) -> None:
+        response = await aclient.post(
             "/api/convert",
-            files={"files": ("large.tac", metars.encode(
-                "utf-8"), "text/plain")},
-            headers=_auth_headers(auth_token),
+            files={"files": ("large.tac", _multi_metar_tac(count), "text/plain")},
+            headers=auth_headers,
         )
         assert response.status_code in [200, 400]
 
@@ -8,8 +8,6 @@ from gui.app import app as gui_app  # type: ignore
 from backend.api import app as backend_app  # type: ignore
 from auth.api import router as auth_router  # type: ignore
 
-import random
-import string
 import pathlib
 import sys
 
@@ -31,58 +29,43 @@ for p in (AUTH_SRC, BACKEND_SRC, GUI_SRC):
         sys.path.insert(0, str(p))
 
 
-# Build a composite app (optional) to show aggregation also works
-composite_app = FastAPI(title="Composite METAR IWXXM App")
-composite_app.include_router(auth_router)
-# Replicate backend routes under /backend to avoid collision with gui
-# (gui and backend both have /api/convert). Mounting preserves original paths.
-composite_app.mount("/backend", backend_app)
-# Mount gui at /gui for completeness (its root index is protected by auth)
-composite_app.mount("/gui", gui_app)
+def _build_composite_app() -> FastAPI:
+    """Aggregate all three services in one app to show mounting works.
 
-
-@pytest.fixture(scope="session")
-def auth_client() -> TestClient:
-    # Only auth router
-    app = FastAPI()
-    app.include_router(auth_router)
-    return TestClient(app)
+    Built on first use by ``composite_client`` so collecting the module (or
+    running with ``-k "not Composite"``) never assembles it.
+    """
+    composite_app = FastAPI(title="Composite METAR IWXXM App")
+    composite_app.include_router(auth_router)
+    # Replicate backend routes under /backend to avoid collision with gui
+    # (gui and backend both have /api/convert). Mounting preserves original paths.
+    composite_app.mount("/backend", backend_app)
+    # Mount gui at /gui for completeness (its root index is protected by auth)
+    composite_app.mount("/gui", gui_app)
+    return composite_app
 
 
 @pytest.fixture(scope="session")
 def backend_client() -> TestClient:
-    return TestClient(backend_app)
+    with TestClient(backend_app) as c:
+        yield c
 
 
 @pytest.fixture(scope="session")
 def gui_client() -> TestClient:
-    return TestClient(gui_app)
+    with TestClient(gui_app) as c:
+        yield c
 
 
 @pytest.fixture(scope="session")
 def composite_client() -> TestClient:
-    return TestClient(composite_app)
+    with TestClient(_build_composite_app()) as c:
+        yield c
 
 
 @pytest.fixture(scope="session")
-def user_token(auth_client: TestClient) -> str:
-    suffix = ''.join(random.choices(
-        string.ascii_lowercase + string.digits, k=8))
-    reg_payload = {
-        "name": "Integration User",
-        "email": f"integration-{suffix}@example.com",
-        "address": "123 Integration Ave",
-        "username": f"intuser{suffix}",
-        "password": "StrongPass123!",
-    }
-    r = auth_client.post("/auth/register", json=reg_payload)
-    assert r.status_code == 200, r.text
-    r_login = auth_client.post("/auth/login", json={
-        "username": reg_payload["username"],
-        "password": reg_payload["password"],
-    })
-    assert r_login.status_code == 200, r_login.text
-    return r_login.json()["access_token"]
+def user_token(shared_auth: dict[str, str]) -> str:
+    return shared_auth["token"]
 
 
 def _auth_headers(token: str) -> dict[str, str]: